@@ -5,7 +5,462 @@ Magic Methods : A commonly used informal term because these methods allow your o
 Special Methods : This is the official term used in the Python documentation.
                   These methods enable custom behavior for built-in operations (like addition, string representation, or calling).
 """
+import sys
 
+################################################################################
+# Demo 03 - Compact Vector: __slots__, in-place operators, __eq__/__hash__, __radd__
+# `v = v + w` in a hot loop allocates a new Vector (and its __dict__) on every step.
+#   __slots__           : x and y live in fixed slots, no per-instance __dict__
+#   __iadd__/__isub__/__imul__ : `v += w` updates v in place, no new object
+#   __eq__/__hash__     : equal vectors compare/hash equal, so they can be interned in a dict/set
+#   intern_vector(v)    : one shared read-only FrozenVector per (x, y); on it `u += w` rebinds u to a new
+#                         Vector (as for a tuple) instead of changing the instance every holder sees
+#   __radd__            : `0 + v` works, so sum(vectors) works without a start Vector
+import time
+import tracemalloc
+
+class Vector:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __add__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return Vector(self.x + other.x, self.y + other.y)
+
+    def __radd__(self, other):
+        if other == 0:  # sum() starts from 0
+            return Vector(self.x, self.y)
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return Vector(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, scalar):
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        return Vector(self.x * scalar, self.y * scalar)
+
+    __rmul__ = __mul__
+
+    def __iadd__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __imul__(self, scalar):
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, Vector):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        # Only hash vectors you no longer mutate in place (intern_vector() hands out FrozenVector for that)
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+        return f"Vector({self.x}, {self.y})"
+
+    def __call__(self, *args, **kwargs):
+        print("It is called")
+
+class DictVector:
+    """Vector from Demo 01: attributes in a per-instance __dict__, only __add__"""
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __add__(self, other):
+        return DictVector(self.x + other.x, self.y + other.y)
+
+    def __repr__(self):
+        return f"DictVector({self.x}, {self.y})"
+
+class FrozenVector(Vector):
+    """Read-only Vector: in-place operators fall back to __add__/__sub__/__mul__, which return a new Vector"""
+    __slots__ = ()
+
+    def __init__(self, x, y):
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __iadd__(self, other):
+        return NotImplemented
+
+    __isub__ = __imul__ = __iadd__
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only, cannot set '{name}'")
+
+_interned = {}  # (x, y) -> FrozenVector, keyed by a tuple so no mutable object ever sits in the keys
+
+def intern_vector(v):
+    """Return the canonical read-only instance equal to v"""
+    key = (v.x, v.y)
+    frozen = _interned.get(key)
+    if frozen is None:
+        frozen = _interned[key] = FrozenVector(v.x, v.y)
+    return frozen
+
+def measure(label, build, loop, n):
+    """Print tracemalloc peak for building n instances, then ops/sec of the accumulate loop"""
+    tracemalloc.start()
+    items = build(n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    loop(items)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<26} | {peak / n:>10.1f} | {n / elapsed:>12,.0f}")
+    return items
+
+def benchmark(n=10**6):
+    print(f"{'n=' + format(n, ','):<26} | {'bytes/obj':>10} | {'ops/sec':>12}")
+
+    def accumulate_dict(items):
+        total = DictVector(0, 0)
+        for v in items:
+            total = total + v
+        return total
+
+    def accumulate_slots(items):
+        total = Vector(0, 0)
+        for v in items:
+            total += v
+        return total
+
+    measure("DictVector: v = v + w", lambda n: [DictVector(i, i) for i in range(n)], accumulate_dict, n)
+    measure("Vector (slots): v += w", lambda n: [Vector(i, i) for i in range(n)], accumulate_slots, n)
+
+    # Peak memory of the accumulate loop itself (garbage produced by `v = v + w`)
+    for label, cls, accumulate in (("DictVector: v = v + w", DictVector, accumulate_dict),
+                                   ("Vector (slots): v += w", Vector, accumulate_slots)):
+        w = cls(1, 1)
+        tracemalloc.start()
+        accumulate(w for _ in range(n))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<26} | loop peak: {peak:,} bytes")
+
+if __name__ == "__main__":
+    v = Vector(5, 10)
+    w = Vector(6, 12)
+    v_id = id(v)
+    v += w
+    print(f"v += w  -> {v}; same object: {id(v) == v_id}")
+    v -= Vector(1, 2)
+    v *= 2
+    print(f"v -= Vector(1, 2); v *= 2 -> {v}")
+    print(f"3 * w = {3 * w}")
+    print(f"sum([...]) = {sum([Vector(1, 1), Vector(2, 2), Vector(3, 3)])}")
+    print(f"Vector(1, 2) == Vector(1, 2): {Vector(1, 2) == Vector(1, 2)}")
+    print(f"intern_vector(Vector(1, 2)) is intern_vector(Vector(1, 2)): "
+          f"{intern_vector(Vector(1, 2)) is intern_vector(Vector(1, 2))}")
+    u = intern_vector(Vector(1, 2))
+    u += Vector(1, 1)
+    print(f"u = intern_vector(Vector(1, 2)); u += Vector(1, 1) -> u = {u}, interned still "
+          f"{intern_vector(Vector(1, 2))}, new object: {u is not intern_vector(Vector(1, 2))}")
+    try:
+        v.z = 1
+    except AttributeError as err:
+        print(f"v.z = 1 -> AttributeError: {err}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-01-dunder-methods.py
+# v += w  -> Vector(11, 22); same object: True
+# v -= Vector(1, 2); v *= 2 -> Vector(20, 40)
+# 3 * w = Vector(18, 36)
+# sum([...]) = Vector(6, 6)
+# Vector(1, 2) == Vector(1, 2): True
+# intern_vector(Vector(1, 2)) is intern_vector(Vector(1, 2)): True
+# u = intern_vector(Vector(1, 2)); u += Vector(1, 1) -> u = Vector(2, 3), interned still Vector(1, 2), new object: True
+# v.z = 1 -> AttributeError: 'Vector' object has no attribute 'z'
+
+# n=1,000,000                |  bytes/obj |      ops/sec
+# DictVector: v = v + w      |      128.4 |    1,778,969
+# Vector (slots): v += w     |       88.4 |    5,969,338
+# DictVector: v = v + w      | loop peak: 744 bytes
+# Vector (slots): v += w     | loop peak: 584 bytes
+
+"""
+🧩 Notes:
+    bytes/obj is the tracemalloc peak of building the list divided by n (object + list slot).
+    Dropping __dict__ saves ~40 bytes per Vector; `v += w` reuses the accumulator instead of allocating one per step.
+    The loop peak is small in both cases because CPython frees each temporary at once (reference counting),
+    the cost of `v = v + w` is the allocate/free work on every step, visible in ops/sec.
+    Do not mutate (+=, -=, *=) a Vector that is stored in a dict/set: its hash would change.
+    intern_vector() avoids this by handing out FrozenVector: += on it returns a new Vector, and x/y cannot be set.
+"""
+
+################################################################################
+# Demo 02 - VectorBatch: bulk arithmetic on many 2-D points
+# Every `v1 + v2` in Demo 01 allocates a new Vector object (with its own __dict__).
+# VectorBatch stores all x values in one contiguous buffer and all y values in another
+# (NumPy when available, else array('d')), so +, -, scalar *, dot and norm run over the whole batch at once.
+# batch[i] returns a VectorView: a Vector that reads/writes the batch buffers directly (zero-copy).
+import math
+import operator
+import time
+from array import array
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, array('d') is always available
+    np = None
+
+if np is not None:
+    def _buffer(values):
+        return np.array(values, dtype=np.float64)
+
+    def _zip_with(op, a, b):
+        return op(a, b)
+
+    def _broadcast(op, a, value):
+        return op(a, value)
+
+    def _hypot(a, b):
+        return np.hypot(a, b)
+
+    def _total(a):
+        return float(a.sum())
+else:
+    def _buffer(values):
+        return array("d", values)
+
+    def _zip_with(op, a, b):
+        return array("d", map(op, a, b))
+
+    def _broadcast(op, a, value):
+        return array("d", map(op, a, repeat(value)))
+
+    def _hypot(a, b):
+        return array("d", map(math.hypot, a, b))
+
+    def _total(a):
+        return math.fsum(a)
+
+class Vector:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y)
+
+    def __repr__(self):
+        return f"Vector({self.x}, {self.y})"
+
+    def __call__(self, *args, **kwargs):
+        print("It is called")
+
+class VectorView(Vector):
+    """Vector backed by one row of a VectorBatch (no copy of x/y)"""
+    def __init__(self, batch, index):
+        self._batch = batch
+        self._index = index
+
+    @property
+    def x(self):
+        return self._batch.xs[self._index]
+
+    @x.setter
+    def x(self, value):
+        self._batch.xs[self._index] = value
+
+    @property
+    def y(self):
+        return self._batch.ys[self._index]
+
+    @y.setter
+    def y(self, value):
+        self._batch.ys[self._index] = value
+
+class VectorBatch:
+    """Struct-of-arrays container: xs[i], ys[i] is the i-th vector"""
+    backend = "numpy" if np is not None else "array"
+
+    def __init__(self, xs, ys):
+        if len(xs) != len(ys):
+            raise ValueError(f"xs and ys must have the same length: {len(xs)} != {len(ys)}")
+        self.xs = _buffer(xs)
+        self.ys = _buffer(ys)
+
+    @classmethod
+    def from_vectors(cls, vectors):
+        vectors = list(vectors)
+        return cls([v.x for v in vectors], [v.y for v in vectors])
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, index):
+        try:
+            index = operator.index(index)
+        except TypeError:
+            raise TypeError(f"VectorBatch indices must be integers, not {type(index).__name__}") from None
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("VectorBatch index out of range")
+        return VectorView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield VectorView(self, index)
+
+    def _check_size(self, other):
+        if len(other) != len(self):
+            raise ValueError(f"VectorBatch sizes differ: {len(self)} != {len(other)}")
+
+    def _combine(self, other, op):
+        if isinstance(other, VectorBatch):
+            self._check_size(other)
+            return self._wrap(_zip_with(op, self.xs, other.xs), _zip_with(op, self.ys, other.ys))
+        if isinstance(other, Vector):  # broadcast one Vector over the whole batch
+            return self._wrap(_broadcast(op, self.xs, other.x), _broadcast(op, self.ys, other.y))
+        return NotImplemented
+
+    def __add__(self, other):
+        return self._combine(other, operator.add)
+
+    def __sub__(self, other):
+        return self._combine(other, operator.sub)
+
+    def __mul__(self, scalar):
+        if not isinstance(scalar, (int, float)):
+            return NotImplemented
+        return self._wrap(_broadcast(operator.mul, self.xs, scalar), _broadcast(operator.mul, self.ys, scalar))
+
+    __rmul__ = __mul__
+
+    def dot(self, other):
+        """Row-wise dot product: xs[i] * other.xs[i] + ys[i] * other.ys[i]"""
+        if not isinstance(other, VectorBatch):
+            raise TypeError(f"dot() needs a VectorBatch, not {type(other).__name__}")
+        self._check_size(other)  # NumPy would broadcast a batch of 1, map() would stop at the shorter one
+        return _zip_with(operator.add,
+                         _zip_with(operator.mul, self.xs, other.xs),
+                         _zip_with(operator.mul, self.ys, other.ys))
+
+    def norm(self):
+        """Row-wise Euclidean length"""
+        return _hypot(self.xs, self.ys)
+
+    def sum(self):
+        """Sum of all vectors, as a single Vector"""
+        return Vector(_total(self.xs), _total(self.ys))
+
+    def __repr__(self):
+        return f"VectorBatch(n={len(self)}, backend={self.backend})"
+
+    @classmethod
+    def _wrap(cls, xs, ys):
+        batch = cls.__new__(cls)
+        batch.xs = xs
+        batch.ys = ys
+        return batch
+
+def benchmark(sizes=(10**3, 10**4, 10**5, 10**6, 10**7), loop_limit=10**6):
+    """Per-object `Vector.__add__` loop vs one `VectorBatch + VectorBatch`.
+
+    The per-object path needs two lists of n Vector objects (plus n results), which above
+    `loop_limit` costs several GB, so it is skipped there.
+    """
+    print(f"{'n':>10} | {'Vector loop (s)':>15} | {'VectorBatch (s)':>15} | {'speedup':>8}")
+    for n in sizes:
+        xs = array("d", range(n))
+        ys = array("d", range(n, 0, -1))
+        batch_a = VectorBatch(xs, ys)
+        batch_b = VectorBatch(ys, xs)
+
+        start = time.perf_counter()
+        batch_a + batch_b
+        batch_time = time.perf_counter() - start
+
+        if n <= loop_limit:
+            vectors_a = [Vector(x, y) for x, y in zip(xs, ys)]
+            vectors_b = [Vector(y, x) for x, y in zip(xs, ys)]
+            start = time.perf_counter()
+            [a + b for a, b in zip(vectors_a, vectors_b)]
+            loop_time = time.perf_counter() - start
+            del vectors_a, vectors_b
+            print(f"{n:>10} | {loop_time:>15.6f} | {batch_time:>15.6f} | {loop_time / batch_time:>7.1f}x")
+        else:
+            print(f"{n:>10} | {'skipped':>15} | {batch_time:>15.6f} | {'-':>8}")
+
+if __name__ == "__main__":
+    points = VectorBatch([1, 2, 3], [10, 20, 30])
+    shifts = VectorBatch([5, 5, 5], [1, 1, 1])
+    print(f"points={points}")
+    print(f"points + shifts = {list(points + shifts)}")
+    print(f"points - Vector(1, 10) = {list(points - Vector(1, 10))}")
+    print(f"2 * points = {list(2 * points)}")
+    print(f"points.dot(shifts) = {list(points.dot(shifts))}")
+    print(f"points.norm() = {[round(n, 3) for n in points.norm()]}")
+    print(f"points.sum() = {points.sum()}")
+
+    first = points[0]          # VectorView, no copy
+    first.x = 100              # writes through to points.xs[0]
+    print(f"points[0]={first}; points.xs[0]={points.xs[0]}")
+    print(f"points[0] + Vector(1, 1) = {first + Vector(1, 1)}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-01-dunder-methods.py
+# points=VectorBatch(n=3, backend=array)
+# points + shifts = [Vector(6.0, 11.0), Vector(7.0, 21.0), Vector(8.0, 31.0)]
+# points - Vector(1, 10) = [Vector(0.0, 0.0), Vector(1.0, 10.0), Vector(2.0, 20.0)]
+# 2 * points = [Vector(2.0, 20.0), Vector(4.0, 40.0), Vector(6.0, 60.0)]
+# points.dot(shifts) = [15.0, 30.0, 45.0]
+# points.norm() = [10.05, 20.1, 30.15]
+# points.sum() = Vector(6.0, 60.0)
+# points[0]=Vector(100.0, 10.0); points.xs[0]=100.0
+# points[0] + Vector(1, 1) = Vector(101.0, 11.0)
+
+#          n | Vector loop (s) | VectorBatch (s) |  speedup
+#       1000 |        0.000543 |        0.000184 |     2.9x
+#      10000 |        0.006050 |        0.002398 |     2.5x
+#     100000 |        0.108085 |        0.020352 |     5.3x
+#    1000000 |        1.374402 |        0.258407 |     5.3x
+#   10000000 |         skipped |        2.383580 |        -
+
+"""
+🧩 Notes:
+    The numbers above use the array('d') fallback (NumPy not installed): each operation is one C-level map()
+    over the buffers instead of n Python-level __add__ calls and n new objects.
+    With NumPy installed the same class switches to ndarray buffers and the batch path is vectorized.
+    VectorView is a real Vector subclass, so existing code that expects a Vector keeps working.
+"""
+
+################################################################################
+# Demo 01 - Vector with dunder methods
 class Vector:
     def __init__(self, x, y):
         self.x = x
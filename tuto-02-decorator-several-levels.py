@@ -3,6 +3,900 @@ import sys
 import time
 from functools import wraps
 
+############################################################
+# Demo 10 - Fast paths for get_list_numbers(n) = 2**1 + 2**2 + ... + 2**(n-1)
+# The decorator demos time the loop below, which computes a new big int 2**i on every iteration.
+#   get_list_numbers        : reference loop from Demo 03/04
+#   get_list_numbers_shift  : same loop, but the next term is the previous one shifted left by 1 bit
+#   get_list_numbers_closed : closed form, a geometric series: 2**1 + ... + 2**(n-1) = 2**n - 2
+# The benchmark checks the three agree and prints their time for several n, so the timing demos
+# have a realistic fast baseline to compare against.
+def get_list_numbers(n):
+    s = 0
+    for i in range(1, n):
+        s += 2**i
+    return s
+
+def get_list_numbers_shift(n):
+    s = 0
+    term = 2
+    for _ in range(1, n):
+        s += term
+        term <<= 1
+    return s
+
+def get_list_numbers_closed(n):
+    if n <= 1:
+        return 0  # empty range(1, n)
+    return (1 << n) - 2
+
+def benchmark(sizes=(10, 1_000, 10_000, 30_000, 90_000)):
+    variants = [get_list_numbers, get_list_numbers_shift, get_list_numbers_closed]
+    print(f"{'n':>7} | " + " | ".join(f"{v.__name__:>24}" for v in variants))
+    for n in sizes:
+        timings = []
+        results = set()
+        for variant in variants:
+            start = time.perf_counter()
+            results.add(variant(n))
+            timings.append(time.perf_counter() - start)
+        assert len(results) == 1, f"variants disagree for n={n}"
+        print(f"{n:>7} | " + " | ".join(f"{t:>23.6f}s" for t in timings))
+
+if __name__ == "__main__":
+    for n in range(0, 200):
+        assert get_list_numbers(n) == get_list_numbers_shift(n) == get_list_numbers_closed(n)
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-02-decorator-several-levels.py
+#       n |         get_list_numbers |   get_list_numbers_shift |  get_list_numbers_closed
+#      10 |                0.000005s |                0.000002s |                0.000001s
+#    1000 |                0.000879s |                0.000161s |                0.000001s
+#   10000 |                0.122273s |                0.006886s |                0.000004s
+#   30000 |                1.066698s |                0.036317s |                0.000011s
+#   90000 |               11.064506s |                0.381116s |                0.000022s
+
+############################################################
+# Demo 09 - Sampling for `duration2` / `logged` on hot functions
+# Timing every call costs two clock reads plus a record per call, which is more than a tiny function itself.
+# A sampler decides how many calls to skip before the next timed one; skipped calls only decrement a counter.
+#   EveryNth(n)            : time 1 call out of n
+#   RandomRate(rate)       : time each call with probability `rate` (geometric skips, so no random() per call)
+#   AdaptiveRate(budget)   : start at rate 1.0 and, every `window` samples, set
+#                            rate = budget * mean call time / mean instrumentation cost
+#                            so the timing overhead stays around `budget` (e.g. 1%) of the function's own time
+# Every sample carries a weight 1/rate (the rate its skip was drawn with), so sum(weights) estimates the number
+# of calls, and SampledStats takes weighted quantiles: while AdaptiveRate changes the rate, a sample taken at
+# rate 0.01 stands for 100 calls, one taken at rate 1.0 for a single call.
+import math
+import random
+from bisect import bisect_left
+from collections import deque
+from itertools import accumulate
+
+class EveryNth:
+    def __init__(self, n):
+        self.n = n
+
+    def next_skip(self, call_time, overhead):
+        return self.n, self.n
+
+class RandomRate:
+    def __init__(self, rate):
+        if not 0 < rate <= 1:
+            raise ValueError(f"rate must be in (0, 1], got {rate}")
+        self.rate = rate
+
+    def next_skip(self, call_time, overhead):
+        return _geometric(self.rate), 1 / self.rate
+
+class AdaptiveRate:
+    def __init__(self, budget=0.01, min_rate=1e-5, window=100):
+        self.budget = budget
+        self.min_rate = min_rate
+        self.window = window
+        self.rate = 1.0
+        self._call_time = 0.0
+        self._overhead = 0.0
+        self._samples = 0
+
+    def next_skip(self, call_time, overhead):
+        self._call_time += call_time
+        self._overhead += overhead
+        self._samples += 1
+        if self._samples >= self.window:
+            wanted = self.budget * self._call_time / max(self._overhead, 1e-9)
+            self.rate = min(1.0, max(self.min_rate, wanted))
+            self._call_time = self._overhead = 0.0
+            self._samples = 0
+        return _geometric(self.rate), 1 / self.rate  # the weight of the sample this skip leads to
+
+def _geometric(rate):
+    """Number of calls until the next sampled one, for a per-call sampling probability `rate`"""
+    if rate >= 1:
+        return 1
+    return int(math.log(1.0 - random.random()) / math.log(1.0 - rate)) + 1
+
+class SampledStats:
+    """Sink: keeps the last `maxlen` (duration, weight) samples and the estimated call count per function"""
+    def __init__(self, maxlen=10_000):
+        self.maxlen = maxlen
+        self.samples = {}
+        self.sample_count = {}
+        self.estimated_calls = {}
+
+    def write(self, function_name, seconds, weight):
+        samples = self.samples.get(function_name)
+        if samples is None:
+            samples = self.samples[function_name] = deque(maxlen=self.maxlen)
+            self.sample_count[function_name] = 0
+            self.estimated_calls[function_name] = 0.0
+        samples.append((seconds, weight))
+        self.sample_count[function_name] += 1
+        self.estimated_calls[function_name] += weight
+
+    def quantile(self, function_name, q):
+        """Weighted quantile: the smallest duration at or above which a fraction 1 - q of the calls lies"""
+        samples = sorted(self.samples[function_name])
+        cumulated = list(accumulate(weight for _, weight in samples))
+        index = bisect_left(cumulated, q * cumulated[-1])
+        return samples[min(index, len(samples) - 1)][0]
+
+    def summary(self, function_name):
+        p50, p99 = self.quantile(function_name, 0.50), self.quantile(function_name, 0.99)
+        return (f"{self.sample_count[function_name]:>9,} samples, ~{self.estimated_calls[function_name]:>11,.0f} calls, "
+                f"p50={p50 * 1e9:.0f}ns p99={p99 * 1e9:.0f}ns")
+
+def _sampled(function, on_sample, sampler):
+    if sampler is None:
+        sampler = EveryNth(1)
+    name = function.__name__
+    clock = time.perf_counter
+    countdown, weight = sampler.next_skip(0.0, 0.0)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        nonlocal countdown, weight
+        countdown -= 1
+        if countdown > 0:  # not `if countdown`: threads racing past 0 must not leave it negative for good
+            return function(*args, **kwargs)
+        start_time = clock()
+        res = function(*args, **kwargs)
+        end_time = clock()
+        on_sample(name, end_time - start_time, weight)
+        # instrumentation cost of this sample ~ one clock read + on_sample()
+        countdown, weight = sampler.next_skip(end_time - start_time, clock() - end_time)
+        return res
+    return wrapper
+
+def _print_duration(function_name, seconds, weight):
+    print(f"Duration to finish the function {function_name} is: {seconds:.9f}(seconds). [1 of ~{weight:.0f} calls]")
+
+def duration2(my_function_args=None, *, sampler=None):
+    if my_function_args is None:
+        return lambda function: duration2(function, sampler=sampler)
+    return _sampled(my_function_args, _print_duration, sampler)
+
+def logged(my_function_args=None, *, sink, sampler=None):
+    if my_function_args is None:
+        return lambda function: logged(function, sink=sink, sampler=sampler)
+    return _sampled(my_function_args, sink.write, sampler)
+
+def make_add_one(label):
+    def add_one(x):
+        return x + 1
+    add_one.__name__ = label
+    return add_one
+
+def benchmark(n=1_000_000):
+    """Overhead per call of `logged` on a tiny function, full timing vs the three samplers"""
+    stats = SampledStats()
+    variants = [
+        ("undecorated", make_add_one("undecorated")),
+        ("every call", logged(make_add_one("every call"), sink=stats)),
+        ("EveryNth(100)", logged(make_add_one("EveryNth(100)"), sink=stats, sampler=EveryNth(100))),
+        ("RandomRate(0.01)", logged(make_add_one("RandomRate(0.01)"), sink=stats, sampler=RandomRate(0.01))),
+        ("AdaptiveRate(0.05)", logged(make_add_one("AdaptiveRate(0.05)"), sink=stats, sampler=AdaptiveRate(0.05))),
+    ]
+    baseline = None
+    print(f"{n:,} calls of add_one")
+    for label, function in variants:
+        start = time.perf_counter()
+        for i in range(n):
+            function(i)
+        per_call = (time.perf_counter() - start) / n
+        if baseline is None:
+            baseline = per_call
+            print(f"{label:<19} | {per_call * 1e9:>5.0f} ns/call")
+        else:
+            print(f"{label:<19} | {(per_call - baseline) * 1e9:>+5.0f} ns/call | {stats.summary(label)}")
+
+if __name__ == "__main__":
+    @duration2(sampler=EveryNth(1000))
+    def get_list_numbers(n):
+        s = 0
+        for i in range(1, n):
+            s += 2**i
+        return s
+
+    for n in range(3000):
+        get_list_numbers(n)
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-02-decorator-several-levels.py
+# Duration to finish the function get_list_numbers is: 0.000824961(seconds). [1 of ~1000 calls]
+# Duration to finish the function get_list_numbers is: 0.002537544(seconds). [1 of ~1000 calls]
+# Duration to finish the function get_list_numbers is: 0.004833442(seconds). [1 of ~1000 calls]
+
+# 1,000,000 calls of add_one
+# undecorated         |    63 ns/call
+# every call          | +1025 ns/call | 1,000,000 samples, ~  1,000,000 calls, p50=164ns p99=246ns
+# EveryNth(100)       |  +185 ns/call |    10,000 samples, ~  1,000,000 calls, p50=154ns p99=321ns
+# RandomRate(0.01)    |  +203 ns/call |     9,792 samples, ~    979,200 calls, p50=167ns p99=421ns
+# AdaptiveRate(0.05)  |  +268 ns/call |    21,166 samples, ~    997,435 calls, p50=188ns p99=368ns
+
+# What remains for the sampled variants (~200-300 ns here) is the Python-level wrapper call with *args/**kwargs
+# and the countdown; the timing + record work itself is paid on 1-2% of the calls only.
+
+############################################################
+# Demo 08 - Async-aware `logged` / `duration2`
+# Applied to an `async def`, the Demo 04 wrapper only times the creation of the coroutine object (~0 s)
+# and its `open()/write()` would block the event loop on every call.
+# Here both decorators check the function type once, at decoration time:
+#   async def            -> async wrapper that times the awaited execution
+#   async def + yield    -> async generator wrapper that sums the time spent inside the generator steps
+#   def                  -> same synchronous wrapper as before
+# and `logged` writes through AsyncBufferedSink: records go to an in-memory deque (never blocks),
+# a background task flushes them with asyncio.to_thread(), so file I/O runs off the event loop.
+import asyncio
+import inspect
+import os
+import tempfile
+from collections import deque
+
+def format_duration(function_name, seconds):
+    return f"Duration to finish the function {function_name} is: {seconds:.2f}(seconds)."
+
+class AsyncBufferedSink:
+    """Queue records in memory, flush them from an asyncio task via a worker thread"""
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._records = deque()
+        self._task = None
+
+    def write(self, function_name, seconds):
+        self._records.append((function_name, seconds))
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def flush(self):
+        pending = len(self._records)
+        if not pending:
+            return
+        popleft = self._records.popleft
+        lines = [format_duration(*popleft()) for _ in range(pending)]
+        await asyncio.to_thread(self._append, "\n".join(lines) + "\n")
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def _append(self, text):
+        with open(self.path, mode="a", encoding="utf8") as f:
+            f.write(text)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+def _timed(function, on_done):
+    """Wrap sync functions, coroutine functions and async generator functions; call on_done(name, seconds)"""
+    name = function.__name__
+    clock = time.perf_counter
+
+    if inspect.isasyncgenfunction(function):
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            agen = function(*args, **kwargs)
+            busy = 0.0
+            try:
+                while True:
+                    start_time = clock()
+                    try:
+                        item = await agen.__anext__()
+                    except StopAsyncIteration:
+                        busy += clock() - start_time
+                        break
+                    busy += clock() - start_time
+                    yield item
+            finally:
+                await agen.aclose()
+                on_done(name, busy)
+        return wrapper
+
+    if inspect.iscoroutinefunction(function):
+        @wraps(function)
+        async def wrapper(*args, **kwargs):
+            start_time = clock()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                on_done(name, clock() - start_time)
+        return wrapper
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start_time = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            on_done(name, clock() - start_time)
+    return wrapper
+
+def _print_duration(function_name, seconds):
+    print(format_duration(function_name, seconds))
+
+def logged(my_function_args=None, *, sink):
+    if my_function_args is None:
+        return lambda function: logged(function, sink=sink)
+    return _timed(my_function_args, sink.write)
+
+def duration2(my_function_args):
+    return _timed(my_function_args, _print_duration)
+
+def sync_logged(my_function_args):
+    """Demo 04 style wrapper, for comparison"""
+    @wraps(my_function_args)
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        res = my_function_args(*args, **kwargs)
+        _print_duration(f"{my_function_args.__name__} (sync wrapper)", time.perf_counter() - start_time)
+        return res
+    return wrapper
+
+async def main(log_path):
+    sink = AsyncBufferedSink(log_path, flush_interval=0.1)
+    await sink.start()
+
+    class AsyncSubscriber:  # from tuto-22 Demo 03
+        def __init__(self, name):
+            self.name = name
+
+        @duration2
+        @logged(sink=sink)
+        async def receive(self, topic, message):
+            await asyncio.sleep(0.5)  # Simulate async processing delay
+            print(f"{self.name} received on '{topic}': {message}")
+
+    @duration2
+    @logged(sink=sink)
+    async def temperatures(count):
+        for value in range(20, 20 + count):
+            await asyncio.sleep(0.1)  # Simulate async sensor read
+            yield value
+
+    @sync_logged
+    async def receive_sync_wrapped(message):
+        await asyncio.sleep(0.5)
+        print(f"received: {message}")
+
+    alice, bob = AsyncSubscriber("Alice"), AsyncSubscriber("Bob")
+    await asyncio.gather(alice.receive("sports", "Team A won the game!"),
+                         bob.receive("sports", "Team A won the game!"))
+    print([value async for value in temperatures(3)])
+    await receive_sync_wrapped("Team B scored a goal!")
+    await sink.aclose()
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "logged.txt")
+        asyncio.run(main(log_path))
+        with open(log_path, encoding="utf8") as f:
+            print(f"--- {os.path.basename(log_path)}")
+            print(f.read(), end="")
+
+sys.exit(0)
+
+# $ python tuto-02-decorator-several-levels.py
+# Alice received on 'sports': Team A won the game!
+# Duration to finish the function receive is: 0.50(seconds).
+# Bob received on 'sports': Team A won the game!
+# Duration to finish the function receive is: 0.50(seconds).
+# Duration to finish the function temperatures is: 0.30(seconds).
+# [20, 21, 22]
+# Duration to finish the function receive_sync_wrapped (sync wrapper) is: 0.00(seconds).
+# received: Team B scored a goal!
+# --- logged.txt
+# Duration to finish the function receive is: 0.50(seconds).
+# Duration to finish the function receive is: 0.50(seconds).
+# Duration to finish the function temperatures is: 0.30(seconds).
+
+############################################################
+# Demo 07 - Memoizing decorator: bounded LRU + per-entry TTL + stats + stampede guard
+# get_list_numbers(n) recomputes sum(2**i) every call. `memoized` keeps results per argument tuple:
+#   maxsize   : LRU bound (OrderedDict, least recently used entry is evicted first), None = unbounded
+#   ttl       : seconds an entry stays valid (time.monotonic), None = forever
+#   stats     : hits / misses / coalesced / evictions / expirations via wrapper.cache_info()
+#   threading : one lock guards the cache; the function itself runs outside the lock
+#   stampede  : concurrent callers with the same missing key wait for the first caller's result
+#               instead of all computing it ("coalesced"); an exception is re-raised to every waiter, not cached
+import threading
+from collections import OrderedDict
+
+_KWARGS_MARK = object()
+
+class _InFlight:
+    """One running computation that other callers can wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+def memoized(my_function_args=None, *, maxsize=128, ttl=None):
+    if my_function_args is None:
+        return lambda function: memoized(function, maxsize=maxsize, ttl=ttl)
+    cache = OrderedDict()  # key -> (expires_at or None, value)
+    in_flight = {}
+    lock = threading.Lock()
+    stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expirations": 0}
+    clock = time.monotonic
+
+    @wraps(my_function_args)
+    def wrapper(*args, **kwargs):
+        key = args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+        with lock:
+            entry = cache.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or clock() < expires_at:
+                    cache.move_to_end(key)
+                    stats["hits"] += 1
+                    return value
+                del cache[key]
+                stats["expirations"] += 1
+            call = in_flight.get(key)
+            if call is None:
+                call = in_flight[key] = _InFlight()
+                stats["misses"] += 1
+                owner = True
+            else:
+                stats["coalesced"] += 1
+                owner = False
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = my_function_args(*args, **kwargs)
+        except BaseException as err:
+            call.error = err
+            raise
+        else:
+            with lock:
+                cache[key] = (None if ttl is None else clock() + ttl, call.result)
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+                    stats["evictions"] += 1
+            return call.result
+        finally:
+            with lock:
+                del in_flight[key]
+            call.done.set()
+
+    def cache_info():
+        with lock:
+            return dict(stats, currsize=len(cache), maxsize=maxsize, ttl=ttl)
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            for name in stats:
+                stats[name] = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+def get_list_numbers(n):
+    s = 0
+    for i in range(1, n):
+        s += 2**i
+    return s
+
+if __name__ == "__main__":
+    cached_get_list_numbers = memoized(get_list_numbers, maxsize=4)
+    workload = [3000, 5000, 3000, 7000, 3000, 5000] * 20
+
+    start = time.perf_counter()
+    for n in workload:
+        get_list_numbers(n)
+    plain_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for n in workload:
+        cached_get_list_numbers(n)
+    cached_time = time.perf_counter() - start
+    print(f"{len(workload)} calls: plain {plain_time:.3f}s, memoized {cached_time:.3f}s")
+    print(f"cache_info: {cached_get_list_numbers.cache_info()}")
+
+    for n in (1, 2, 3, 4, 5):  # 5 distinct keys with maxsize=4 -> LRU evictions
+        cached_get_list_numbers(n)
+    print(f"after 5 new keys: {cached_get_list_numbers.cache_info()}")
+
+    @memoized(ttl=0.05)
+    def slow_square(x):
+        time.sleep(0.2)  # simulate an expensive call
+        return x * x
+
+    threads = [threading.Thread(target=slow_square, args=(12,)) for _ in range(8)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"8 concurrent slow_square(12): {time.perf_counter() - start:.2f}s, {slow_square.cache_info()}")
+    time.sleep(0.1)  # let the entry expire
+    slow_square(12)
+    print(f"after ttl: {slow_square.cache_info()}")
+
+sys.exit(0)
+
+# $ python tuto-02-decorator-several-levels.py
+# 120 calls: plain 1.889s, memoized 0.065s
+# cache_info: {'hits': 117, 'misses': 3, 'coalesced': 0, 'evictions': 0, 'expirations': 0, 'currsize': 3, 'maxsize': 4, 'ttl': None}
+# after 5 new keys: {'hits': 117, 'misses': 8, 'coalesced': 0, 'evictions': 4, 'expirations': 0, 'currsize': 4, 'maxsize': 4, 'ttl': None}
+# 8 concurrent slow_square(12): 0.20s, {'hits': 0, 'misses': 1, 'coalesced': 7, 'evictions': 0, 'expirations': 0, 'currsize': 1, 'maxsize': 128, 'ttl': 0.05}
+# after ttl: {'hits': 0, 'misses': 2, 'coalesced': 7, 'evictions': 0, 'expirations': 1, 'currsize': 1, 'maxsize': 128, 'ttl': 0.05}
+
+############################################################
+# Demo 06 - Metrics mode for `duration2` (Demo 03's `duration` + @wraps): perf_counter_ns + HDR-style histograms
+# time.time() rounded to 0.01 s shows 0.00 for any function faster than 5 ms, and print() on every call floods stdout.
+# With metrics=True the decorator records perf_counter_ns() samples into a per-function LatencyHistogram:
+#   - fixed memory: log-linear buckets (HdrHistogram idea), 2**SUB_BITS sub-buckets per power of two,
+#     so every sample up to 2**64 ns fits in ~1000 counters with <= 1/16 (6.25%) relative error (larger
+#     ones are clamped into the last bucket)
+#   - no printing on the hot path; read the numbers with get_stats() or dump_stats_json()
+#   - record() is a plain (unlocked) update: under heavy multi-threading a rare count can be lost, as in
+#     HdrHistogram's non-concurrent Histogram; use one histogram per thread if exact counts matter
+import json
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of nanosecond samples"""
+    SUB_BITS = 5                     # 32 buckets for [0, 32), then 16 buckets per power of two
+    _HALF = 1 << (SUB_BITS - 1)
+    _SIZE = (64 - SUB_BITS + 2) * _HALF
+
+    def __init__(self):
+        self.counts = [0] * self._SIZE
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        # value >> shift keeps the top SUB_BITS bits (16..31); shift * 16 selects the power-of-two band
+        shift = value.bit_length() - self.SUB_BITS
+        if shift < 0:
+            shift = 0
+        index = shift * self._HALF + (value >> shift)
+        if index >= self._SIZE:  # 2**64 ns or more: counted in the last bucket (max still keeps the value)
+            index = self._SIZE - 1
+        self.counts[index] += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @classmethod
+    def bucket_upper_bound(cls, index):
+        """Largest value that lands in bucket `index`"""
+        if index < 2 * cls._HALF:
+            return index
+        shift, offset = divmod(index - 2 * cls._HALF, cls._HALF)
+        return ((offset + cls._HALF + 1) << (shift + 1)) - 1
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentile(self, p):
+        count = self.count
+        if not count:
+            return 0
+        rank = max(1, -(-count * p // 100))  # ceil without floats
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index == self._SIZE - 1:  # the last bucket also holds the clamped samples
+                    return self.max
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def stats(self):
+        count = self.count
+        return {
+            "count": count,
+            "total_ns": self.total,
+            "mean_ns": self.total / count if count else 0,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max,
+        }
+
+_histograms = {}
+
+def get_histogram(name):
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms.setdefault(name, LatencyHistogram())
+    return histogram
+
+def get_stats(name=None):
+    """Stats of one decorated function (by qualified name), or of all of them"""
+    if name is not None:
+        return _histograms[name].stats()
+    return {key: histogram.stats() for key, histogram in _histograms.items()}
+
+def dump_stats_json(path=None):
+    text = json.dumps(get_stats(), indent=2)
+    if path is not None:
+        with open(path, mode="w", encoding="utf8") as f:
+            f.write(text + "\n")
+    return text
+
+def duration2(my_function_args=None, *, metrics=False):
+    """@duration2 prints every call (now with perf_counter), @duration2(metrics=True) only records"""
+    if my_function_args is None:
+        return lambda function: duration2(function, metrics=metrics)
+    clock = time.perf_counter_ns
+
+    if metrics:
+        record = get_histogram(f"{my_function_args.__module__}.{my_function_args.__qualname__}").record
+
+        @wraps(my_function_args)
+        def wrapper(*args, **kwargs):
+            start_time = clock()
+            res = my_function_args(*args, **kwargs)
+            record(clock() - start_time)
+            return res
+        return wrapper
+
+    @wraps(my_function_args)
+    def wrapper(*args, **kwargs):
+        start_time = clock()
+        res = my_function_args(*args, **kwargs)
+        print(f"Duration to finish the function {my_function_args.__name__} is: {(clock() - start_time) / 1e9:.9f}(seconds).")
+        return res
+    return wrapper
+
+@duration2(metrics=True)
+def get_list_numbers(n):
+    s = 0
+    for i in range(1, n):
+        s += 2**i
+    return s
+
+@duration2(metrics=True)
+def add_one(x):
+    return x + 1
+
+if __name__ == "__main__":
+    for n in range(1, 2000):
+        get_list_numbers(n)
+
+    loop_start = time.perf_counter_ns()
+    for i in range(100_000):
+        add_one(i)
+    loop_ns = time.perf_counter_ns() - loop_start  # wall time of the whole loop, not a histogram sample
+    print(f"add_one: {loop_ns / 100_000:.0f} ns/call including the histogram record")
+
+    stats = get_stats("__main__.add_one")
+    print(f"add_one stats: count={stats['count']} p50={stats['p50_ns']}ns p99={stats['p99_ns']}ns max={stats['max_ns']}ns")
+    print(dump_stats_json())
+
+sys.exit(0)
+
+# $ python tuto-02-decorator-several-levels.py
+# add_one: 780 ns/call including the histogram record
+# add_one stats: count=100000 p50=151ns p99=703ns max=119301ns
+# {
+#   "__main__.get_list_numbers": {
+#     "count": 1999,
+#     "total_ns": 1451454760,
+#     "mean_ns": 726090.4252126063,
+#     "p50_ns": 786431,
+#     "p90_ns": 1441791,
+#     "p99_ns": 2228223,
+#     "max_ns": 6949725
+#   },
+#   "__main__.add_one": {
+#     "count": 100000,
+#     "total_ns": 19278967,
+#     "mean_ns": 192.78967,
+#     "p50_ns": 151,
+#     "p90_ns": 271,
+#     "p99_ns": 703,
+#     "max_ns": 119301
+#   }
+# }
+
+############################################################
+# Demo 05 - Buffered asynchronous sink for `logged`
+# Demo 04 opens the log file, appends one line and closes it on EVERY call (3 syscalls + formatting per call).
+# Here `logged` only hands a (function name, duration) record to a pluggable sink:
+#   FileSink         : same behaviour as Demo 04 (open/append/close per record)
+#   BufferedFileSink : appends to an in-memory deque; a background thread formats and writes the records
+#                      in one batch when `max_records` are pending or every `flush_interval` seconds,
+#                      and atexit flushes whatever is left when the interpreter exits.
+import atexit
+import os
+import tempfile
+import threading
+from collections import deque
+
+def format_duration(function_name, seconds):
+    return f"Duration to finish the function {function_name} is: {seconds:.2f}(seconds)."
+
+class FileSink:
+    """Write every record straight to the file (Demo 04 behaviour)"""
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, function_name, seconds):
+        with open(self.path, mode="a", encoding="utf8") as f:
+            f.write(format_duration(function_name, seconds) + "\n")
+
+    def close(self):
+        pass
+
+class BufferedFileSink:
+    """Batch records in memory and flush them from a background writer thread"""
+    def __init__(self, path, max_records=10_000, flush_interval=1.0):
+        self.path = path
+        self.max_records = max_records
+        self.flush_interval = flush_interval
+        self._records = deque()  # append()/popleft() are thread-safe, no lock on the hot path
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="BufferedFileSink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, function_name, seconds):
+        self._records.append((function_name, seconds))
+        if len(self._records) >= self.max_records:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._flush_lock:
+            pending = len(self._records)
+            if not pending:
+                return
+            popleft = self._records.popleft
+            lines = [format_duration(*popleft()) for _ in range(pending)]
+            with open(self.path, mode="a", encoding="utf8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+def logged(my_function_args=None, *, sink=None):
+    """Use as @logged (FileSink on file_output_path) or @logged(sink=BufferedFileSink(...))"""
+    if my_function_args is None:
+        return lambda function: logged(function, sink=sink)
+    if sink is None:
+        sink = FileSink(file_output_path)
+    write = sink.write
+    name = my_function_args.__name__
+    clock = time.perf_counter
+
+    @wraps(my_function_args)
+    def wrapper(*args, **kwargs):
+        start_time = clock()
+        res = my_function_args(*args, **kwargs)
+        write(name, clock() - start_time)
+        return res
+    return wrapper
+
+def benchmark(n=100_000):
+    """Per-call overhead of `logged` with FileSink vs BufferedFileSink, over n calls of a no-op function"""
+    def noop(x):
+        return x
+
+    def run(function):
+        start = time.perf_counter()
+        for i in range(n):
+            function(i)
+        return time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = run(noop)
+        print(f"{n:,} calls, undecorated: {baseline / n * 1e9:.0f} ns/call")
+        print(f"{'sink':<38} | {'overhead/call':>13} | {'close()':>9} | {'lines':>8}")
+        sinks = [
+            ("FileSink (Demo 04)", FileSink(os.path.join(tmp, "file.txt"))),
+            ("BufferedFileSink (flush every 10,000)", BufferedFileSink(os.path.join(tmp, "buffered.txt"))),
+            ("BufferedFileSink (flush at close)", BufferedFileSink(os.path.join(tmp, "close.txt"), max_records=n + 1,
+                                                                   flush_interval=60)),
+        ]
+        for label, sink in sinks:
+            elapsed = run(logged(noop, sink=sink))
+            start = time.perf_counter()
+            sink.close()
+            close_time = time.perf_counter() - start
+            with open(sink.path, encoding="utf8") as f:
+                lines = sum(1 for _ in f)
+            print(f"{label:<38} | {(elapsed - baseline) / n * 1e9:>10.0f} ns | {close_time * 1e3:>6.1f} ms | {lines:>8,}")
+
+file_output_path = "./tuto-02-decorator-logged.txt"
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = BufferedFileSink(os.path.join(tmp, "logged.txt"), flush_interval=0.1)
+
+        @logged(sink=sink)
+        def get_list_numbers(n):
+            s = 0
+            for i in range(1, n):
+                s += 2**i
+            return s
+
+        for n in (10, 100, 1000):
+            get_list_numbers(n)
+        print(f"Pending records before flush: {len(sink._records)}")
+        sink.close()
+        with open(sink.path, encoding="utf8") as f:
+            print(f.read(), end="")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-02-decorator-several-levels.py
+# Pending records before flush: 3
+# Duration to finish the function get_list_numbers is: 0.00(seconds).
+# Duration to finish the function get_list_numbers is: 0.00(seconds).
+# Duration to finish the function get_list_numbers is: 0.00(seconds).
+
+# 100,000 calls, undecorated: 52 ns/call
+# sink                                   | overhead/call |   close() |    lines
+# FileSink (Demo 04)                     |      16060 ns |    0.0 ms |  100,000
+# BufferedFileSink (flush every 10,000)  |       2273 ns |    6.6 ms |  100,000
+# BufferedFileSink (flush at close)      |        891 ns |  116.7 ms |  100,000
+
+# The calling thread only does perf_counter() twice and one deque.append(): ~0.9 µs here (a slow 1-CPU sandbox,
+# where the undecorated call itself costs 52 ns). Formatting and writing move to the writer thread; with a single
+# CPU it still shares the GIL with the caller, which is why periodic flushing shows up in the middle row.
+
 ############################################################
 # Demo 04 - Logging to file "tuto-02-decorator-logged.txt"
 file_output_path = "./tuto-02-decorator-logged.txt"
@@ -1,4 +1,334 @@
 """Generator"""
+import sys
+
+################################################################################
+# Demo 03 - Real memory accounting: deep size and tracemalloc peaks
+# sys.getsizeof(values) in Demo 01 is the size of the generator object shell only (always ~200 bytes),
+# and sys.getsizeof(list) counts the list's pointer array but not the items.
+#   deep_getsizeof(obj)      : size of obj plus everything it references (each object counted once),
+#                              skipping shared objects such as modules, classes and functions
+#   measure_generator(f, n)  : tracemalloc peak/retained bytes of consuming f(n) item by item
+#                              vs materializing list(f(n)), using snapshots taken before/after
+#   CLI                      : python tuto-03-generator-getsizeof.py -f <factory> -n <n>
+#                              factory is a name from FACTORIES or "module:function"
+import getopt
+import gc
+import importlib
+import tracemalloc
+import types
+
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.CodeType)
+
+def deep_getsizeof(obj):
+    seen = set()
+    pending = [obj]
+    total = 0
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, _SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        pending.extend(gc.get_referents(current))
+    return total
+
+def _traced(action):
+    """Run action() under tracemalloc; return (result, peak bytes, bytes still allocated afterwards)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = action()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return result, peak, retained
+
+def _consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+def measure_generator(factory, n):
+    generator = factory(n)
+    values = list(factory(n))
+    rows = [
+        ("sys.getsizeof(generator)", sys.getsizeof(generator)),
+        ("deep_getsizeof(generator)", deep_getsizeof(generator)),
+        ("sys.getsizeof(list)", sys.getsizeof(values)),
+        ("deep_getsizeof(list)", deep_getsizeof(values)),
+    ]
+    del values
+    _, consume_peak, consume_retained = _traced(lambda: _consume(factory(n)))
+    materialized, list_peak, list_retained = _traced(lambda: list(factory(n)))
+    del materialized
+    rows += [
+        ("peak: consume one by one", consume_peak),
+        ("peak: list(generator)", list_peak),
+        ("retained after consume", consume_retained),
+        ("retained after list()", list_retained),
+    ]
+    return rows
+
+def my_generator(n):
+    for x in range(1, n):
+        yield 2**x
+
+def numbers(n):
+    for x in range(n):
+        yield x
+
+def words(n):
+    for x in range(n):
+        yield f"word-{x}"
+
+FACTORIES = {"my_generator": my_generator, "numbers": numbers, "words": words}
+
+def load_factory(spec):
+    if spec in FACTORIES:
+        return FACTORIES[spec]
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"Unknown factory '{spec}', use one of {sorted(FACTORIES)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def main():
+    try:
+        opts, _ = getopt.getopt(sys.argv[1:], "f:n:", ["factory=", "n="])
+    except getopt.GetoptError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+    factory_spec, n = "my_generator", 1000
+    for opt, arg in opts:
+        if opt in ("-f", "--factory"):
+            factory_spec = arg
+        elif opt in ("-n", "--n"):
+            n = arg
+    try:
+        n = int(n)
+        if n < 0:
+            raise ValueError(f"n must not be negative: {n}")
+        factory = load_factory(factory_spec)
+    except (ValueError, ImportError, AttributeError) as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    print(f"{factory_spec}(n={n:,})")
+    for label, size in measure_generator(factory, n):
+        print(f"  {label:<27} {size:>14,} bytes")
+
+if __name__ == "__main__":
+    main()
+
+sys.exit(0)
+
+# $ python tuto-03-generator-getsizeof.py
+# my_generator(n=1,000)
+#   sys.getsizeof(generator)               216 bytes
+#   deep_getsizeof(generator)              305 bytes
+#   sys.getsizeof(list)                  8,856 bytes
+#   deep_getsizeof(list)               101,508 bytes
+#   peak: consume one by one             1,660 bytes
+#   peak: list(generator)              105,540 bytes
+#   retained after consume                 944 bytes
+#   retained after list()              105,148 bytes
+
+# $ python tuto-03-generator-getsizeof.py -f numbers -n 100000
+# numbers(n=100,000)
+#   sys.getsizeof(generator)               208 bytes
+#   deep_getsizeof(generator)              292 bytes
+#   sys.getsizeof(list)                800,984 bytes
+#   deep_getsizeof(list)             3,600,984 bytes
+#   peak: consume one by one             1,200 bytes
+#   peak: list(generator)            3,993,832 bytes
+#   retained after consume                 944 bytes
+#   retained after list()            3,993,640 bytes
+
+# $ python tuto-03-generator-getsizeof.py -f words -n 100000
+# words(n=100,000)
+#   sys.getsizeof(generator)               208 bytes
+#   deep_getsizeof(generator)              290 bytes
+#   sys.getsizeof(list)                800,984 bytes
+#   deep_getsizeof(list)             6,689,874 bytes
+#   peak: consume one by one             1,340 bytes
+#   peak: list(generator)            6,691,032 bytes
+#   retained after consume                 944 bytes
+#   retained after list()            6,690,754 bytes
+
+# $ python tuto-03-generator-getsizeof.py -f builtins:range -n 100000
+# builtins:range(n=100,000)
+#   sys.getsizeof(generator)                48 bytes
+#   deep_getsizeof(generator)               48 bytes
+#   sys.getsizeof(list)                800,056 bytes
+#   deep_getsizeof(list)             3,600,056 bytes
+#   peak: consume one by one             1,072 bytes
+#   peak: list(generator)            3,992,776 bytes
+#   retained after consume                 944 bytes
+#   retained after list()            3,992,712 bytes
+
+# $ python tuto-03-generator-getsizeof.py -f nope
+# Error: Unknown factory 'nope', use one of ['my_generator', 'numbers', 'words'] or module:function
+
+# $ python tuto-03-generator-getsizeof.py -n abc
+# Error: invalid literal for int() with base 10: 'abc'
+
+# $ python tuto-03-generator-getsizeof.py -n -5
+# Error: n must not be negative: -5
+
+"""
+🧩 Notes:
+    The generator stays ~200-300 bytes whatever n is; what it saves is visible in the tracemalloc peaks:
+    consuming one item at a time peaks at ~1 KB, list() peaks at the full deep size of the list.
+    "retained" is the snapshot difference while the result is still referenced
+    (~1 KB of it is tracemalloc's own bookkeeping).
+"""
+
+################################################################################
+# Demo 02 - Lazy streaming pipeline around my_generator
+# Stream wraps any iterable and chains stages that are all generators/iterators, so nothing runs
+# until the end of the chain is iterated and at most one chunk/window is alive at a time.
+#   map / filter  : builtin map()/filter() (lazy)
+#   take(n)       : first n items (itertools.islice)
+#   chunked(n)    : tuples of n items
+#   batch(n)      : array chunks of n items, so a consumer works per chunk (sum(chunk), buffer protocol, ...);
+#                   the typecode follows the data: 'q' for ints, 'd' for floats; a chunk that does not fit
+#                   (an int beyond int64, as my_generator yields from 2**63 on, or mixed types) stays a list;
+#                   batch(n, typecode) forces one typecode and raises OverflowError/TypeError instead; it also
+#                   fills the array straight from the stream, without the intermediate list of n ints
+#   window(n)     : sliding windows of n items (deque(maxlen=n))
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from itertools import islice
+
+def my_generator(n):
+    for x in range(1, n):
+        yield 2**x
+
+class Stream:
+    """Lazy, chainable pipeline over an iterable"""
+    def __init__(self, iterable):
+        self._iterable = iterable
+
+    def __iter__(self):
+        return iter(self._iterable)
+
+    def map(self, function):
+        return Stream(map(function, self._iterable))
+
+    def filter(self, predicate):
+        return Stream(filter(predicate, self._iterable))
+
+    def take(self, n):
+        return Stream(islice(self._iterable, n))
+
+    def chunked(self, size):
+        _check_size(size)
+        def chunks(iterator):
+            while chunk := tuple(islice(iterator, size)):
+                yield chunk
+        return Stream(chunks(iter(self._iterable)))
+
+    def batch(self, size, typecode=None):
+        _check_size(size)
+        def batches(iterator):
+            if typecode is not None:
+                while chunk := array(typecode, islice(iterator, size)):
+                    yield chunk
+            else:
+                while chunk := list(islice(iterator, size)):
+                    yield _packed(chunk)
+        return Stream(batches(iter(self._iterable)))
+
+    def window(self, size):
+        _check_size(size)
+        def windows(iterator):
+            window = deque(islice(iterator, size - 1), maxlen=size)
+            for item in iterator:
+                window.append(item)
+                yield tuple(window)
+        return Stream(windows(iter(self._iterable)))
+
+def _check_size(size):
+    # checked eagerly: with size 0, chunked()/batch() would yield nothing and drop the whole stream
+    if size < 1:
+        raise ValueError("size must be >= 1")
+
+def _packed(chunk):
+    try:
+        return array("q", chunk)
+    except OverflowError:
+        return chunk
+    except TypeError:  # 'd' only for floats alone: array('d') would silently round ints above 2**53
+        return array("d", chunk) if set(map(type, chunk)) == {float} else chunk
+
+def numbers(n):
+    for x in range(n):
+        yield x
+
+def streamed_total(n):
+    return sum(sum(chunk) for chunk in Stream(numbers(n)).map(lambda x: x * 3).filter(lambda x: x % 2 == 0).batch(4096, "q"))
+
+def materialized_total(n):
+    values = list(numbers(n))
+    tripled = [x * 3 for x in values]
+    evens = [x for x in tripled if x % 2 == 0]
+    return sum(evens)
+
+def benchmark(sizes=(10**4, 10**5, 10**6)):
+    """tracemalloc peak of the same pipeline, streamed vs materialized with lists at every stage"""
+    print(f"{'n':>10} | {'stream peak':>12} | {'list peak':>12} | {'stream (s)':>10} | {'list (s)':>8}")
+    for n in sizes:
+        row = []
+        for pipeline in (streamed_total, materialized_total):
+            tracemalloc.start()
+            start = time.perf_counter()
+            total = pipeline(n)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            row.append((total, peak, elapsed))
+        (stream_total, stream_peak, stream_time), (list_total, list_peak, list_time) = row
+        assert stream_total == list_total
+        print(f"{n:>10,} | {stream_peak / 1024:>9,.0f} KB | {list_peak / 1024:>9,.0f} KB | {stream_time:>10.3f} | {list_time:>8.3f}")
+
+if __name__ == "__main__":
+    print(list(Stream(my_generator(100)).take(8)))
+    print(list(Stream(my_generator(100)).filter(lambda v: v % 3 == 1).take(4)))
+    print(list(Stream(my_generator(100)).map(lambda v: v.bit_length()).chunked(3).take(3)))
+    print(list(Stream(my_generator(100)).take(5).window(3)))
+    print(list(Stream(my_generator(40)).batch(16)))
+    print([getattr(chunk, "typecode", "list") for chunk in Stream(my_generator(100)).batch(16)])
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-03-generator-getsizeof.py
+# [2, 4, 8, 16, 32, 64, 128, 256]
+# [4, 16, 64, 256]
+# [(2, 3, 4), (5, 6, 7), (8, 9, 10)]
+# [(2, 4, 8), (4, 8, 16), (8, 16, 32)]
+# [array('q', [2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536]), array('q', [131072, 262144, 524288, 1048576, 2097152, 4194304, 8388608, 16777216, 33554432, 67108864, 134217728, 268435456, 536870912, 1073741824, 2147483648, 4294967296]), array('q', [8589934592, 17179869184, 34359738368, 68719476736, 137438953472, 274877906944, 549755813888])]
+# ['q', 'q', 'q', 'list', 'list', 'list', 'list']
+
+#          n |  stream peak |    list peak | stream (s) | list (s)
+#     10,000 |        42 KB |       822 KB |      0.022 |    0.018
+#    100,000 |        68 KB |     8,238 KB |      0.217 |    0.190
+#  1,000,000 |        68 KB |    83,060 KB |      1.981 |    1.720
+
+"""
+🧩 Notes:
+    The streamed peak stays flat as n grows (one 4096-item array chunk plus a few frames),
+    the list version keeps three lists of n ints alive.
+    tracemalloc measures the Python allocations directly; process RSS cannot be reset within one process,
+    so peak RSS would only show the largest run.
+"""
+
+################################################################################
+# Demo 01 - my_generator and sys.getsizeof
 def my_generator(n):
     for x in range(1, n):
         yield 2**x
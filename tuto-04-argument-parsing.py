@@ -1,6 +1,1385 @@
 """Argument Parsing"""
 import sys
 
+###################################
+# Demo 07 - getopt - Append daemon with group commit
+# At high message rates even a bulk writer per producer is not enough: many local clients each want their
+# message on disk (fsync'ed) and an fsync costs milliseconds. The daemon does group commit:
+#   --serve SOCKET -f FILE [--window-ms 2] [--durable]
+#       asyncio server on a Unix socket; every message that arrives within `window-ms` of the first one of a group
+#       is written with ONE write() (+ ONE fsync() with --durable, in a worker thread so the loop keeps accepting);
+#       a client gets "OK <n>" only after its messages are committed, "ERROR <reason>" if a write failed
+#   --connect SOCKET -m MESSAGE | --stdin | --batch-file F   client helper (send_messages), no -f needed
+#   --connect SOCKET                                          prints the daemon counters (messages, groups,
+#                                                             msgs/s, mean group size, p50/p99 commit latency)
+#   --daemon-bench N   N fsync'ed messages: one `-f -m` CLI process per message vs the daemon with 50 clients
+# Everything from Demo 06 (append modes, --stress, --startup-bench, lazy imports) is unchanged.
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+APPEND_MODES = ("unbuffered", "buffered", "atomic", "lock")
+
+SHORTOPTS = "f:m:"
+LONGOPTS = ["filename=", "message=", "stdin", "batch-file=", "buffer-size=", "fsync=", "append-mode=", "stress=",
+            "startup-bench=", "budget-ms=", "serve=", "connect=", "window-ms=", "durable", "daemon-bench="]
+
+# option -> (options key, takes an argument)
+OPTION_TABLE = {
+    "-f": ("-f", True), "--filename": ("-f", True),
+    "-m": ("-m", True), "--message": ("-m", True),
+    "--stdin": ("--stdin", False),
+    "--batch-file": ("--batch-file", True),
+    "--buffer-size": ("--buffer-size", True),
+    "--fsync": ("--fsync", True),
+    "--append-mode": ("--append-mode", True),
+    "--stress": ("--stress", True),
+    "--startup-bench": ("--startup-bench", True),
+    "--budget-ms": ("--budget-ms", True),
+    "--serve": ("--serve", True),
+    "--connect": ("--connect", True),
+    "--window-ms": ("--window-ms", True),
+    "--durable": ("--durable", False),
+    "--daemon-bench": ("--daemon-bench", True),
+}
+
+DEFAULT_OPTIONS = {"-f": "", "-m": None, "--stdin": False, "--batch-file": "", "--buffer-size": DEFAULT_BUFFER_SIZE,
+                   "--fsync": ("never", None), "--append-mode": "atomic", "--stress": None,
+                   "--startup-bench": None, "--budget-ms": 15.0, "--serve": "", "--connect": "", "--window-ms": 2.0,
+                   "--durable": False, "--daemon-bench": None}
+
+def parse_args(argv):
+    """Return getopt-style [(opt, arg), ...]; fall back to getopt for anything the table does not cover"""
+    opts = []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg == "--" or not arg.startswith("-") or arg == "-":
+            break
+        name, has_value, value = arg.partition("=") if arg.startswith("--") else (arg[:2], len(arg) > 2, arg[2:])
+        spec = OPTION_TABLE.get(name)
+        if spec is None or (has_value and not spec[1]):
+            return _getopt(argv)
+        if spec[1] and not has_value:
+            index += 1
+            if index == len(argv):
+                return _getopt(argv)
+            value = argv[index]
+        opts.append((name, value if spec[1] else ""))
+        index += 1
+    return opts
+
+def _getopt(argv):
+    import getopt
+    try:
+        opts, _ = getopt.getopt(args=argv, shortopts=SHORTOPTS, longopts=LONGOPTS)
+    except getopt.GetoptError as err:
+        raise ValueError(str(err)) from err
+    return opts
+
+def startup_bench(runs, budget_ms):
+    import os
+    import statistics
+    import subprocess
+    import tempfile
+    import time
+
+    def cold_starts(command):
+        timings = []
+        for _ in range(runs + 3):  # 3 warmup runs, as hyperfine --warmup 3
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings[3:]
+
+    def imported_modules(command):
+        stderr = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True, check=True).stderr
+        modules = {}
+        for line in stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                self_us, _, name = line[len("import time:"):].split("|")
+                if self_us.strip().isdigit():
+                    modules[name.strip()] = int(self_us)
+        return modules
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = [sys.executable, "-c", "pass"]
+        cli = [sys.executable, __file__, "-f", os.path.join(tmp, "startup.txt"), "-m", "startup"]
+        results = {}
+        for label, command in (("python -c pass", bare), ("this CLI -f -m", cli)):
+            timings = cold_starts(command)
+            results[label] = statistics.mean(timings)
+            print(f"{label:<15}: {statistics.mean(timings):6.1f} ms ± {statistics.stdev(timings):4.1f} ms "
+                  f"[min {min(timings):.1f}, max {max(timings):.1f}, {runs} runs]")
+        baseline = imported_modules(bare)
+        extra = {name: us for name, us in imported_modules(cli).items() if name not in baseline}
+
+    overhead = results["this CLI -f -m"] - results["python -c pass"]
+    print(f"imports on top of the bare interpreter: {', '.join(sorted(extra)) or 'none'} "
+          f"({sum(extra.values()) / 1000:.1f} ms self time)")
+    print(f"startup overhead: {overhead:.1f} ms (budget {budget_ms:.1f} ms)")
+    if overhead > budget_ms:
+        print("FAIL: cold start is over budget")
+        sys.exit(1)
+    print("OK")
+
+
+def parse_fsync_policy(value):
+    kind, _, arg = value.partition(":")
+    if kind == "never" and not arg:
+        return ("never", None)
+    if kind == "interval" and arg:
+        return ("interval", float(arg))
+    if kind == "every" and arg and int(arg) > 0:
+        return ("every", int(arg))
+    raise ValueError(f"Unsupported fsync policy: {value} (use never, interval:<seconds> or every:<n>)")
+
+class _FsyncPolicy:
+    def __init__(self, policy):
+        import time
+        self._monotonic = time.monotonic
+        self.kind, self.arg = policy
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def after_write(self, fd, count):
+        import os
+        self.pending += count
+        if (self.kind == "every" and self.pending >= self.arg) or \
+                (self.kind == "interval" and self._monotonic() - self.last_sync >= self.arg):
+            os.fsync(fd)
+            self.pending = 0
+            self.last_sync = self._monotonic()
+
+    def close(self, fd):
+        import os
+        if self.kind != "never":
+            os.fsync(fd)
+
+def _chunks(messages, chunk_size):
+    """Encode messages as lines and group whole lines into chunks of about chunk_size bytes"""
+    chunk = []
+    size = 0
+    for message in messages:
+        record = (message + "\n").encode("utf8")
+        if chunk and size + len(record) > chunk_size:
+            yield b"".join(chunk), len(chunk)
+            chunk = []
+            size = 0
+        chunk.append(record)
+        size += len(record)
+    if chunk:
+        yield b"".join(chunk), len(chunk)
+
+def _write_all(fd, data):
+    import os
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def append_messages(filename, messages, buffer_size=DEFAULT_BUFFER_SIZE, fsync_policy=("never", None), mode="atomic"):
+    """Append every message as one line, return the number of lines written"""
+    import os
+    if mode not in APPEND_MODES:
+        raise ValueError(f"Unsupported append mode: {mode} (use {', '.join(APPEND_MODES)})")
+    policy = _FsyncPolicy(fsync_policy)
+    count = 0
+    if mode == "unbuffered":
+        with open(filename, mode="ab", buffering=0) as f:
+            for message in messages:
+                f.write(message.encode("utf8"))
+                f.write(b"\n")
+                count += 1
+                policy.after_write(f.fileno(), 1)
+            policy.close(f.fileno())
+        return count
+
+    if mode == "buffered":
+        with open(filename, mode="a", encoding="utf8", buffering=buffer_size) as f:
+            for message in messages:
+                f.write(message + "\n")
+                count += 1
+                if policy.kind != "never":
+                    f.flush()
+                    policy.after_write(f.fileno(), 1)
+            f.flush()
+            policy.close(f.fileno())
+        return count
+
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        for chunk, lines in _chunks(messages, buffer_size):
+            if mode == "lock":
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    _write_all(fd, chunk)
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                _write_all(fd, chunk)
+            count += lines
+            policy.after_write(fd, lines)
+        policy.close(fd)
+    finally:
+        os.close(fd)
+    return count
+
+def read_lines(stream):
+    for line in stream:
+        yield line.rstrip("\n")
+
+def stress(workers, messages_per_worker, buffer_size=65536):
+    """N concurrent CLI processes append M messages each; count torn/missing lines per append mode"""
+    import os
+    import re
+    import subprocess
+    import tempfile
+    import time
+    line_pattern = re.compile(r"^worker-(\d+) message (\d+) (x+)$")
+    padding = "x" * 60
+    print(f"{workers} processes x {messages_per_worker:,} messages, --buffer-size {buffer_size}")
+    print(f"{'mode':<10} | {'seconds':>7} | {'lines/sec':>10} | {'torn':>6} | {'missing':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        batch_files = []
+        for worker in range(workers):
+            batch_file = os.path.join(tmp, f"worker-{worker}.txt")
+            with open(batch_file, mode="w", encoding="utf8") as f:
+                for i in range(messages_per_worker):
+                    f.write(f"worker-{worker} message {i} {padding}\n")
+            batch_files.append(batch_file)
+
+        for mode in APPEND_MODES:
+            target = os.path.join(tmp, f"{mode}.log")
+            start = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, __file__, "-f", target, "--batch-file", batch_file,
+                                  "--append-mode", mode, "--buffer-size", str(buffer_size)],
+                                 stdout=subprocess.DEVNULL)
+                for batch_file in batch_files
+            ]
+            for process in processes:
+                process.wait()
+            elapsed = time.perf_counter() - start
+
+            seen = set()
+            torn = 0
+            with open(target, encoding="utf8") as f:
+                for line in f:
+                    match = line_pattern.match(line.rstrip("\n"))
+                    if match is None or match.group(3) != padding:
+                        torn += 1
+                    else:
+                        seen.add((match.group(1), match.group(2)))
+            missing = workers * messages_per_worker - len(seen)
+            total = workers * messages_per_worker
+            print(f"{mode:<10} | {elapsed:>7.2f} | {total / elapsed:>10,.0f} | {torn:>6} | {missing:>7}")
+
+class _Group:
+    """Messages that will be committed together with one write()"""
+    def __init__(self, loop):
+        self.lines = []
+        self.arrivals = []
+        self.committed = loop.create_future()
+
+class GroupCommitServer:
+    """asyncio daemon: collect the messages of all clients for `window` seconds, then one write() (+ fsync)"""
+    def __init__(self, filename, window=0.002, durable=False):
+        import asyncio
+        from collections import deque
+        self.filename = filename
+        self.window = window
+        self.durable = durable
+        self.counters = {"messages": 0, "groups": 0, "failed_groups": 0, "bytes": 0, "clients": 0}
+        self.latencies = deque(maxlen=100_000)  # arrival -> committed, seconds
+        self._write_lock = asyncio.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._group = None
+        self._started = self._loop.time()
+
+    async def handle_client(self, reader, writer):
+        command = (await reader.readline()).strip()
+        if command == b"STATS":
+            import json
+            writer.write(json.dumps(self.stats()).encode("utf8") + b"\n")
+        elif command == b"APPEND":
+            self.counters["clients"] += 1
+            count = 0
+            groups = []
+            while line := await reader.readline():
+                group = self.add(line if line.endswith(b"\n") else line + b"\n")
+                if not groups or groups[-1] is not group:
+                    groups.append(group)
+                count += 1
+            try:
+                for group in groups:  # any of them may have failed, not only the last one
+                    await group.committed
+            except OSError as error:
+                writer.write(f"ERROR {error}\n".encode("utf8"))
+            else:
+                writer.write(f"OK {count}\n".encode("utf8"))
+        else:
+            writer.write(b"ERROR unknown command\n")
+        await writer.drain()
+        writer.close()
+
+    def add(self, line):
+        if self._group is None:
+            self._group = _Group(self._loop)
+            self._loop.call_later(self.window, lambda: self._loop.create_task(self.commit()))
+        self._group.lines.append(line)
+        self._group.arrivals.append(self._loop.time())
+        return self._group
+
+    async def commit(self):
+        import asyncio
+        group, self._group = self._group, None
+        if group is None:
+            return
+        data = b"".join(group.lines)
+        try:
+            async with self._write_lock:
+                await asyncio.to_thread(self._append, data)
+        except OSError as error:  # disk full, bad path...: every client of the group gets an ERROR reply
+            self.counters["failed_groups"] += 1
+            group.committed.set_exception(error)
+            group.committed.exception()  # mark it retrieved: clients may all have disconnected
+            return
+        now = self._loop.time()
+        self.latencies.extend(now - arrival for arrival in group.arrivals)
+        self.counters["messages"] += len(group.lines)
+        self.counters["groups"] += 1
+        self.counters["bytes"] += len(data)
+        group.committed.set_result(len(group.lines))
+
+    def _append(self, data):
+        import os
+        fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            _write_all(fd, data)
+            if self.durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        elapsed = self._loop.time() - self._started
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000 if latencies else 0.0
+        return dict(self.counters,
+                    messages_per_sec=round(self.counters["messages"] / elapsed if elapsed else 0.0, 1),
+                    mean_group_size=round(self.counters["messages"] / max(self.counters["groups"], 1), 1),
+                    latency_p50_ms=round(percentile(50), 3), latency_p99_ms=round(percentile(99), 3))
+
+async def _serve(socket_path, filename, window, durable, ready=None, stop=None):
+    import asyncio
+    import contextlib
+    import os
+    import signal
+    server = GroupCommitServer(filename, window, durable)
+    unix_server = await asyncio.start_unix_server(server.handle_client, path=socket_path)
+    if stop is None:
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signum, stop.set)
+    if ready is not None:
+        ready.set_result(server)
+    async with unix_server:
+        await stop.wait()
+    await server.commit()
+    with contextlib.suppress(FileNotFoundError):  # Python 3.13+ already removed it when the server closed
+        os.unlink(socket_path)
+    return server
+
+def serve(socket_path, filename, window, durable):
+    import asyncio
+    print(f"Serving {socket_path} -> {filename} (window {window * 1000:.1f} ms, durable={durable}), Ctrl+C to stop")
+    server = asyncio.run(_serve(socket_path, filename, window, durable))
+    print(f"Stopped: {server.stats()}")
+
+def send_messages(socket_path, messages, command=b"APPEND"):
+    """Client helper: send messages (one per line) to the daemon, return its reply once they are committed"""
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(command + b"\n" + b"".join((message + "\n").encode("utf8") for message in messages))
+        client.shutdown(socket.SHUT_WR)
+        reply = b""
+        while chunk := client.recv(65536):
+            reply += chunk
+    return reply.decode("utf8").strip()
+
+def daemon_bench(messages, clients=50, window=0.002):
+    """fsync'ed appends: one CLI process per message vs the group-commit daemon with concurrent clients"""
+    import asyncio
+    import os
+    import statistics
+    import subprocess
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process_messages = min(messages, 100)
+        target = os.path.join(tmp, "per-process.txt")
+        latencies = []
+        start = time.perf_counter()
+        for i in range(process_messages):
+            sent = time.perf_counter()
+            subprocess.run([sys.executable, __file__, "-f", target, "-m", f"message {i}", "--fsync", "every:1"],
+                           stdout=subprocess.DEVNULL, check=True)
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - start
+        print(f"{'one process per message':<26}: {process_messages:>6} msgs in {elapsed:6.2f}s = "
+              f"{process_messages / elapsed:>7,.0f} msgs/s, latency p50 {statistics.median(latencies) * 1000:6.1f} ms")
+
+        async def run_daemon():
+            socket_path = os.path.join(tmp, "daemon.sock")
+            ready = asyncio.get_running_loop().create_future()
+            stop = asyncio.Event()
+            serving = asyncio.create_task(_serve(socket_path, os.path.join(tmp, "daemon.txt"), window, True, ready, stop))
+            await ready
+            latencies = []
+
+            async def client(client_id):
+                for i in range(client_id, messages, clients):
+                    sent = time.perf_counter()
+                    reader, writer = await asyncio.open_unix_connection(socket_path)
+                    writer.write(f"APPEND\nmessage {i}\n".encode("utf8"))
+                    writer.write_eof()
+                    await reader.read()
+                    writer.close()
+                    latencies.append(time.perf_counter() - sent)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client(client_id) for client_id in range(clients)))
+            elapsed = time.perf_counter() - start
+            stop.set()
+            server = await serving
+            return elapsed, latencies, server.stats()
+
+        elapsed, latencies, stats = asyncio.run(run_daemon())
+        latencies.sort()
+        print(f"{'group-commit daemon':<26}: {messages:>6} msgs in {elapsed:6.2f}s = {messages / elapsed:>7,.0f} msgs/s, "
+              f"latency p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms, p99 {latencies[len(latencies) * 99 // 100] * 1000:.1f} ms")
+        print(f"  {clients} concurrent clients, {stats['groups']} write()+fsync() for {stats['messages']} messages "
+              f"(mean group {stats['mean_group_size']:.1f})")
+
+def main():
+    try:
+        opts = parse_args(sys.argv[1:])
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    options = dict(DEFAULT_OPTIONS)
+
+    try:
+        for opt, arg in opts:
+            print(f"Processing opt={opt}; arg={arg}")
+            key = OPTION_TABLE[opt][0]
+            if key == "--buffer-size":
+                options[key] = int(arg)
+                if options[key] < 2:
+                    raise ValueError(f"--buffer-size must be at least 2 (0 is unbuffered, 1 is line buffering): {arg}")
+            elif key == "--fsync":
+                options[key] = parse_fsync_policy(arg)
+            elif key == "--append-mode":
+                if arg not in APPEND_MODES:
+                    raise ValueError(f"Unsupported append mode: {arg} (use {', '.join(APPEND_MODES)})")
+                options[key] = arg
+            elif key == "--stress":
+                workers, _, messages = arg.partition(":")
+                options[key] = (int(workers), int(messages))
+            elif key in ("--startup-bench", "--daemon-bench"):
+                options[key] = int(arg)
+                if key == "--startup-bench" and options[key] < 2:
+                    raise ValueError(f"--startup-bench needs at least 2 runs for a standard deviation: {arg}")
+            elif key in ("--budget-ms", "--window-ms"):
+                options[key] = float(arg)
+            else:
+                options[key] = True if key in ("--stdin", "--durable") else arg
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    if options["--startup-bench"] is not None:
+        startup_bench(options["--startup-bench"], options["--budget-ms"])
+        sys.exit(0)
+
+    if options["--stress"] is not None:
+        stress(*options["--stress"])
+        sys.exit(0)
+
+    if options["--daemon-bench"] is not None:
+        daemon_bench(options["--daemon-bench"], window=options["--window-ms"] / 1000)
+        sys.exit(0)
+
+    if options["--serve"]:
+        if not options["-f"]:
+            print("Error: filename is required.")
+            sys.exit(1)
+        serve(options["--serve"], options["-f"], options["--window-ms"] / 1000, options["--durable"])
+        sys.exit(0)
+
+    filename = options["-f"]
+    if not filename and not options["--connect"]:
+        print("Error: filename is required.")
+        sys.exit(1)
+
+    def connect(messages, command=b"APPEND"):
+        try:
+            return send_messages(options["--connect"], messages, command)
+        except OSError as err:  # no daemon listening: ConnectionRefusedError, FileNotFoundError
+            print(f"Error: cannot connect to {options['--connect']}: {err}")
+            sys.exit(1)
+
+    if options["--connect"] and options["-m"] is None and not options["--stdin"] and not options["--batch-file"]:
+        print(connect([], command=b"STATS"))
+        sys.exit(0)
+
+    if not options["--stdin"] and not options["--batch-file"] and not options["--connect"]:
+        message = options["-m"] or ""
+        append_messages(filename, [message], options["--buffer-size"], options["--fsync"], options["--append-mode"])
+        print(f"Wrote message '{message}' to filename: {filename}")
+        sys.exit(0)
+
+    def messages():
+        if options["-m"] is not None:
+            yield options["-m"]
+        if options["--batch-file"]:
+            with open(options["--batch-file"], encoding="utf8") as batch:
+                yield from read_lines(batch)
+        if options["--stdin"]:
+            yield from read_lines(sys.stdin)
+
+    import time
+    start = time.perf_counter()
+    if options["--connect"]:
+        reply = connect(list(messages()))
+        print(f"Daemon replied '{reply}' in {time.perf_counter() - start:.3f}s")
+        sys.exit(0 if reply.startswith("OK") else 1)
+    count = append_messages(filename, messages(), options["--buffer-size"], options["--fsync"], options["--append-mode"])
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} messages to filename: {filename} in {elapsed:.3f}s ({count / max(elapsed, 1e-9):,.0f} lines/sec)")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+
+# $ python tuto-04-argument-parsing.py --serve /tmp/append.sock -f out.txt --durable
+# Processing opt=--serve; arg=/tmp/append.sock
+# Processing opt=-f; arg=out.txt
+# Processing opt=--durable; arg=
+# Serving /tmp/append.sock -> out.txt (window 2.0 ms, durable=True), Ctrl+C to stop
+# ^C
+# Stopped: {'messages': 1001, 'groups': 2, 'failed_groups': 0, 'bytes': 3913, 'clients': 2, 'messages_per_sec': 825.6, 'mean_group_size': 500.5, 'latency_p50_ms': 1.941, 'latency_p99_ms': 3.073}
+
+# # (other terminal)
+# $ python tuto-04-argument-parsing.py --connect /tmp/append.sock -m Bon-weekend\ Paris\ !
+# Processing opt=--connect; arg=/tmp/append.sock
+# Processing opt=-m; arg=Bon-weekend Paris !
+# Daemon replied 'OK 1' in 0.018s
+
+# $ seq 1 1000 | python tuto-04-argument-parsing.py --connect /tmp/append.sock --stdin
+# Processing opt=--connect; arg=/tmp/append.sock
+# Processing opt=--stdin; arg=
+# Daemon replied 'OK 1000' in 0.016s
+
+# $ python tuto-04-argument-parsing.py --connect /tmp/append.sock
+# Processing opt=--connect; arg=/tmp/append.sock
+# {"messages": 1001, "groups": 2, "failed_groups": 0, "bytes": 3913, "clients": 2, "messages_per_sec": 830.5, "mean_group_size": 500.5, "latency_p50_ms": 1.941, "latency_p99_ms": 3.073}
+
+# $ python tuto-04-argument-parsing.py --daemon-bench 5000
+# Processing opt=--daemon-bench; arg=5000
+# one process per message   :    100 msgs in   3.64s =      28 msgs/s, latency p50   37.1 ms
+# group-commit daemon       :   5000 msgs in   1.22s =   4,090 msgs/s, latency p50   12.1 ms, p99 19.5 ms
+#   50 concurrent clients, 100 write()+fsync() for 5000 messages (mean group 50.0)
+
+###################################
+# Demo 06 - getopt - Startup-time budget and lazy imports
+# Called from shell loops, this CLI spends most of its wall clock starting the interpreter and importing modules.
+#   - module load imports nothing but sys; os/time/fcntl (cheap) and subprocess/tempfile/re (expensive) are
+#     imported inside the functions that need them
+#   - getopt itself imports gettext, which imports re (~10 ms here), so the options are parsed with a
+#     precompiled table (OPTION_TABLE, built once at import); getopt is only imported for what the table does
+#     not cover (abbreviated long options, bundled short options, errors), so its results and messages are unchanged
+#   - --startup-bench RUNS (at least 2) times RUNS cold starts of `-f <file> -m <message>` against a bare `python -c pass`
+#     (mean ± stddev, min..max, as hyperfine prints them), lists what `-X importtime` shows this script imports
+#     on top of the bare interpreter, and exits 1 if the mean overhead is over --budget-ms (default 15)
+# Append modes, --fsync, --stdin/--batch-file and --stress work as in Demo 04/05.
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+APPEND_MODES = ("unbuffered", "buffered", "atomic", "lock")
+
+SHORTOPTS = "f:m:"
+LONGOPTS = ["filename=", "message=", "stdin", "batch-file=", "buffer-size=", "fsync=", "append-mode=", "stress=",
+            "startup-bench=", "budget-ms="]
+
+# option -> (options key, takes an argument)
+OPTION_TABLE = {
+    "-f": ("-f", True), "--filename": ("-f", True),
+    "-m": ("-m", True), "--message": ("-m", True),
+    "--stdin": ("--stdin", False),
+    "--batch-file": ("--batch-file", True),
+    "--buffer-size": ("--buffer-size", True),
+    "--fsync": ("--fsync", True),
+    "--append-mode": ("--append-mode", True),
+    "--stress": ("--stress", True),
+    "--startup-bench": ("--startup-bench", True),
+    "--budget-ms": ("--budget-ms", True),
+}
+
+DEFAULT_OPTIONS = {"-f": "", "-m": None, "--stdin": False, "--batch-file": "", "--buffer-size": DEFAULT_BUFFER_SIZE,
+                   "--fsync": ("never", None), "--append-mode": "atomic", "--stress": None,
+                   "--startup-bench": None, "--budget-ms": 15.0}
+
+def parse_args(argv):
+    """Return getopt-style [(opt, arg), ...]; fall back to getopt for anything the table does not cover"""
+    opts = []
+    index = 0
+    while index < len(argv):
+        arg = argv[index]
+        if arg == "--" or not arg.startswith("-") or arg == "-":
+            break
+        name, has_value, value = arg.partition("=") if arg.startswith("--") else (arg[:2], len(arg) > 2, arg[2:])
+        spec = OPTION_TABLE.get(name)
+        if spec is None or (has_value and not spec[1]):
+            return _getopt(argv)
+        if spec[1] and not has_value:
+            index += 1
+            if index == len(argv):
+                return _getopt(argv)
+            value = argv[index]
+        opts.append((name, value if spec[1] else ""))
+        index += 1
+    return opts
+
+def _getopt(argv):
+    import getopt
+    try:
+        opts, _ = getopt.getopt(args=argv, shortopts=SHORTOPTS, longopts=LONGOPTS)
+    except getopt.GetoptError as err:
+        raise ValueError(str(err)) from err
+    return opts
+
+def startup_bench(runs, budget_ms):
+    import os
+    import statistics
+    import subprocess
+    import tempfile
+    import time
+
+    def cold_starts(command):
+        timings = []
+        for _ in range(runs + 3):  # 3 warmup runs, as hyperfine --warmup 3
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings[3:]
+
+    def imported_modules(command):
+        stderr = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True, check=True).stderr
+        modules = {}
+        for line in stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                self_us, _, name = line[len("import time:"):].split("|")
+                if self_us.strip().isdigit():
+                    modules[name.strip()] = int(self_us)
+        return modules
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bare = [sys.executable, "-c", "pass"]
+        cli = [sys.executable, __file__, "-f", os.path.join(tmp, "startup.txt"), "-m", "startup"]
+        results = {}
+        for label, command in (("python -c pass", bare), ("this CLI -f -m", cli)):
+            timings = cold_starts(command)
+            results[label] = statistics.mean(timings)
+            print(f"{label:<15}: {statistics.mean(timings):6.1f} ms ± {statistics.stdev(timings):4.1f} ms "
+                  f"[min {min(timings):.1f}, max {max(timings):.1f}, {runs} runs]")
+        baseline = imported_modules(bare)
+        extra = {name: us for name, us in imported_modules(cli).items() if name not in baseline}
+
+    overhead = results["this CLI -f -m"] - results["python -c pass"]
+    print(f"imports on top of the bare interpreter: {', '.join(sorted(extra)) or 'none'} "
+          f"({sum(extra.values()) / 1000:.1f} ms self time)")
+    print(f"startup overhead: {overhead:.1f} ms (budget {budget_ms:.1f} ms)")
+    if overhead > budget_ms:
+        print("FAIL: cold start is over budget")
+        sys.exit(1)
+    print("OK")
+
+
+def parse_fsync_policy(value):
+    kind, _, arg = value.partition(":")
+    if kind == "never" and not arg:
+        return ("never", None)
+    if kind == "interval" and arg:
+        return ("interval", float(arg))
+    if kind == "every" and arg and int(arg) > 0:
+        return ("every", int(arg))
+    raise ValueError(f"Unsupported fsync policy: {value} (use never, interval:<seconds> or every:<n>)")
+
+class _FsyncPolicy:
+    def __init__(self, policy):
+        import time
+        self._monotonic = time.monotonic
+        self.kind, self.arg = policy
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def after_write(self, fd, count):
+        import os
+        self.pending += count
+        if (self.kind == "every" and self.pending >= self.arg) or \
+                (self.kind == "interval" and self._monotonic() - self.last_sync >= self.arg):
+            os.fsync(fd)
+            self.pending = 0
+            self.last_sync = self._monotonic()
+
+    def close(self, fd):
+        import os
+        if self.kind != "never":
+            os.fsync(fd)
+
+def _chunks(messages, chunk_size):
+    """Encode messages as lines and group whole lines into chunks of about chunk_size bytes"""
+    chunk = []
+    size = 0
+    for message in messages:
+        record = (message + "\n").encode("utf8")
+        if chunk and size + len(record) > chunk_size:
+            yield b"".join(chunk), len(chunk)
+            chunk = []
+            size = 0
+        chunk.append(record)
+        size += len(record)
+    if chunk:
+        yield b"".join(chunk), len(chunk)
+
+def _write_all(fd, data):
+    import os
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def append_messages(filename, messages, buffer_size=DEFAULT_BUFFER_SIZE, fsync_policy=("never", None), mode="atomic"):
+    """Append every message as one line, return the number of lines written"""
+    import os
+    if mode not in APPEND_MODES:
+        raise ValueError(f"Unsupported append mode: {mode} (use {', '.join(APPEND_MODES)})")
+    policy = _FsyncPolicy(fsync_policy)
+    count = 0
+    if mode == "unbuffered":
+        with open(filename, mode="ab", buffering=0) as f:
+            for message in messages:
+                f.write(message.encode("utf8"))
+                f.write(b"\n")
+                count += 1
+                policy.after_write(f.fileno(), 1)
+            policy.close(f.fileno())
+        return count
+
+    if mode == "buffered":
+        with open(filename, mode="a", encoding="utf8", buffering=buffer_size) as f:
+            for message in messages:
+                f.write(message + "\n")
+                count += 1
+                if policy.kind != "never":
+                    f.flush()
+                    policy.after_write(f.fileno(), 1)
+            f.flush()
+            policy.close(f.fileno())
+        return count
+
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        for chunk, lines in _chunks(messages, buffer_size):
+            if mode == "lock":
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    _write_all(fd, chunk)
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                _write_all(fd, chunk)
+            count += lines
+            policy.after_write(fd, lines)
+        policy.close(fd)
+    finally:
+        os.close(fd)
+    return count
+
+def read_lines(stream):
+    for line in stream:
+        yield line.rstrip("\n")
+
+def stress(workers, messages_per_worker, buffer_size=65536):
+    """N concurrent CLI processes append M messages each; count torn/missing lines per append mode"""
+    import os
+    import re
+    import subprocess
+    import tempfile
+    import time
+    line_pattern = re.compile(r"^worker-(\d+) message (\d+) (x+)$")
+    padding = "x" * 60
+    print(f"{workers} processes x {messages_per_worker:,} messages, --buffer-size {buffer_size}")
+    print(f"{'mode':<10} | {'seconds':>7} | {'lines/sec':>10} | {'torn':>6} | {'missing':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        batch_files = []
+        for worker in range(workers):
+            batch_file = os.path.join(tmp, f"worker-{worker}.txt")
+            with open(batch_file, mode="w", encoding="utf8") as f:
+                for i in range(messages_per_worker):
+                    f.write(f"worker-{worker} message {i} {padding}\n")
+            batch_files.append(batch_file)
+
+        for mode in APPEND_MODES:
+            target = os.path.join(tmp, f"{mode}.log")
+            start = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, __file__, "-f", target, "--batch-file", batch_file,
+                                  "--append-mode", mode, "--buffer-size", str(buffer_size)],
+                                 stdout=subprocess.DEVNULL)
+                for batch_file in batch_files
+            ]
+            for process in processes:
+                process.wait()
+            elapsed = time.perf_counter() - start
+
+            seen = set()
+            torn = 0
+            with open(target, encoding="utf8") as f:
+                for line in f:
+                    match = line_pattern.match(line.rstrip("\n"))
+                    if match is None or match.group(3) != padding:
+                        torn += 1
+                    else:
+                        seen.add((match.group(1), match.group(2)))
+            missing = workers * messages_per_worker - len(seen)
+            total = workers * messages_per_worker
+            print(f"{mode:<10} | {elapsed:>7.2f} | {total / elapsed:>10,.0f} | {torn:>6} | {missing:>7}")
+
+def main():
+    try:
+        opts = parse_args(sys.argv[1:])
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    options = dict(DEFAULT_OPTIONS)
+
+    try:
+        for opt, arg in opts:
+            print(f"Processing opt={opt}; arg={arg}")
+            key = OPTION_TABLE[opt][0]
+            if key == "--buffer-size":
+                options[key] = int(arg)
+                if options[key] < 2:
+                    raise ValueError(f"--buffer-size must be at least 2 (0 is unbuffered, 1 is line buffering): {arg}")
+            elif key == "--fsync":
+                options[key] = parse_fsync_policy(arg)
+            elif key == "--append-mode":
+                if arg not in APPEND_MODES:
+                    raise ValueError(f"Unsupported append mode: {arg} (use {', '.join(APPEND_MODES)})")
+                options[key] = arg
+            elif key == "--stress":
+                workers, _, messages = arg.partition(":")
+                options[key] = (int(workers), int(messages))
+            elif key in ("--startup-bench", "--budget-ms"):
+                options[key] = float(arg) if key == "--budget-ms" else int(arg)
+                if key == "--startup-bench" and options[key] < 2:
+                    raise ValueError(f"--startup-bench needs at least 2 runs for a standard deviation: {arg}")
+            else:
+                options[key] = True if key == "--stdin" else arg
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    if options["--startup-bench"] is not None:
+        startup_bench(options["--startup-bench"], options["--budget-ms"])
+        sys.exit(0)
+
+    if options["--stress"] is not None:
+        stress(*options["--stress"])
+        sys.exit(0)
+
+    filename = options["-f"]
+    if not filename:
+        print("Error: filename is required.")
+        sys.exit(1)
+
+    if not options["--stdin"] and not options["--batch-file"]:
+        message = options["-m"] or ""
+        append_messages(filename, [message], options["--buffer-size"], options["--fsync"], options["--append-mode"])
+        print(f"Wrote message '{message}' to filename: {filename}")
+        sys.exit(0)
+
+    def messages():
+        if options["-m"] is not None:
+            yield options["-m"]
+        if options["--batch-file"]:
+            with open(options["--batch-file"], encoding="utf8") as batch:
+                yield from read_lines(batch)
+        if options["--stdin"]:
+            yield from read_lines(sys.stdin)
+
+    import time
+    start = time.perf_counter()
+    count = append_messages(filename, messages(), options["--buffer-size"], options["--fsync"], options["--append-mode"])
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} messages to filename: {filename} in {elapsed:.3f}s ({count / max(elapsed, 1e-9):,.0f} lines/sec)")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+
+# $ python tuto-04-argument-parsing.py --startup-bench 20
+# Processing opt=--startup-bench; arg=20
+# python -c pass :   12.7 ms ±  0.8 ms [min 11.4, max 14.0, 20 runs]
+# this CLI -f -m :   21.7 ms ±  2.1 ms [min 18.1, max 24.5, 20 runs]
+# imports on top of the bare interpreter: none (0.0 ms self time)
+# startup overhead: 9.0 ms (budget 15.0 ms)
+# OK
+
+# $ python tuto-04-argument-parsing.py --startup-bench 20 --budget-ms 5; echo "exit=$?"
+# Processing opt=--startup-bench; arg=20
+# Processing opt=--budget-ms; arg=5
+# python -c pass :   16.4 ms ±  1.4 ms [min 12.6, max 18.1, 20 runs]
+# this CLI -f -m :   29.9 ms ±  3.6 ms [min 23.6, max 39.0, 20 runs]
+# imports on top of the bare interpreter: none (0.0 ms self time)
+# startup overhead: 13.6 ms (budget 5.0 ms)
+# FAIL: cold start is over budget
+# exit=1
+
+"""
+🧩 Notes:
+    Same machine, same `-f <file> -m <message>` command, mean of 20 cold starts:
+        python -c pass  : 16.8 ms
+        Demo 05 CLI     : 51.6 ms  (fcntl, getopt -> gettext -> re, subprocess, tempfile at module load)
+        Demo 06 CLI     : 26.3 ms  (no import beyond the bare interpreter)
+    What is left is compiling this file: a script run as __main__ is never cached in __pycache__,
+    and compiling this whole file takes ~9 ms here.
+"""
+
+###################################
+# Demo 05 - getopt - Safe concurrent appends from several processes
+# In Demo 04 the buffered text file flushes whenever its buffer is full, usually in the middle of a line,
+# so two processes appending to the same file interleave partial lines ("torn" lines).
+# --append-mode chooses how records reach the file:
+#   unbuffered : one unbuffered write() for the message and one for "\n" (like print() to an unbuffered file),
+#                what our workers did; kept only to show the problem
+#   buffered   : Demo 04 behaviour; CPython's text layer hands whole lines to the buffer, but a line longer
+#                than the buffer, or any non-Python writer, can still be split
+#   atomic     : os.open(O_APPEND) and one os.write() per chunk of WHOLE lines (a line is never split across writes);
+#                the kernel appends each write() at the end of file in one piece on local Linux file systems
+#   lock       : same chunks, each write() done while holding an advisory fcntl.flock(LOCK_EX) on the file,
+#                safe with every writer that also takes the lock (including short writes, NFS excepted)
+# --stress N:M runs the stress benchmark: N processes of this CLI append M messages each to one file
+# for every mode, then checks every line is intact and no message is missing, and prints the throughput.
+import fcntl
+import getopt
+import os
+import re
+import subprocess
+import tempfile
+import time
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+APPEND_MODES = ("unbuffered", "buffered", "atomic", "lock")
+
+def parse_fsync_policy(value):
+    kind, _, arg = value.partition(":")
+    if kind == "never" and not arg:
+        return ("never", None)
+    if kind == "interval" and arg:
+        return ("interval", float(arg))
+    if kind == "every" and arg and int(arg) > 0:
+        return ("every", int(arg))
+    raise ValueError(f"Unsupported fsync policy: {value} (use never, interval:<seconds> or every:<n>)")
+
+class _FsyncPolicy:
+    def __init__(self, policy):
+        self.kind, self.arg = policy
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def after_write(self, fd, count):
+        self.pending += count
+        if (self.kind == "every" and self.pending >= self.arg) or \
+                (self.kind == "interval" and time.monotonic() - self.last_sync >= self.arg):
+            os.fsync(fd)
+            self.pending = 0
+            self.last_sync = time.monotonic()
+
+    def close(self, fd):
+        if self.kind != "never":
+            os.fsync(fd)
+
+def _chunks(messages, chunk_size):
+    """Encode messages as lines and group whole lines into chunks of about chunk_size bytes"""
+    chunk = []
+    size = 0
+    for message in messages:
+        record = (message + "\n").encode("utf8")
+        if chunk and size + len(record) > chunk_size:
+            yield b"".join(chunk), len(chunk)
+            chunk = []
+            size = 0
+        chunk.append(record)
+        size += len(record)
+    if chunk:
+        yield b"".join(chunk), len(chunk)
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def append_messages(filename, messages, buffer_size=DEFAULT_BUFFER_SIZE, fsync_policy=("never", None), mode="atomic"):
+    """Append every message as one line, return the number of lines written"""
+    if mode not in APPEND_MODES:
+        raise ValueError(f"Unsupported append mode: {mode} (use {', '.join(APPEND_MODES)})")
+    policy = _FsyncPolicy(fsync_policy)
+    count = 0
+    if mode == "unbuffered":
+        with open(filename, mode="ab", buffering=0) as f:
+            for message in messages:
+                f.write(message.encode("utf8"))
+                f.write(b"\n")
+                count += 1
+                policy.after_write(f.fileno(), 1)
+            policy.close(f.fileno())
+        return count
+
+    if mode == "buffered":
+        with open(filename, mode="a", encoding="utf8", buffering=buffer_size) as f:
+            for message in messages:
+                f.write(message + "\n")
+                count += 1
+                if policy.kind != "never":
+                    f.flush()
+                    policy.after_write(f.fileno(), 1)
+            f.flush()
+            policy.close(f.fileno())
+        return count
+
+    fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        for chunk, lines in _chunks(messages, buffer_size):
+            if mode == "lock":
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    _write_all(fd, chunk)
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                _write_all(fd, chunk)
+            count += lines
+            policy.after_write(fd, lines)
+        policy.close(fd)
+    finally:
+        os.close(fd)
+    return count
+
+def read_lines(stream):
+    for line in stream:
+        yield line.rstrip("\n")
+
+def stress(workers, messages_per_worker, buffer_size=65536):
+    """N concurrent CLI processes append M messages each; count torn/missing lines per append mode"""
+    line_pattern = re.compile(r"^worker-(\d+) message (\d+) (x+)$")
+    padding = "x" * 60
+    print(f"{workers} processes x {messages_per_worker:,} messages, --buffer-size {buffer_size}")
+    print(f"{'mode':<10} | {'seconds':>7} | {'lines/sec':>10} | {'torn':>6} | {'missing':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        batch_files = []
+        for worker in range(workers):
+            batch_file = os.path.join(tmp, f"worker-{worker}.txt")
+            with open(batch_file, mode="w", encoding="utf8") as f:
+                for i in range(messages_per_worker):
+                    f.write(f"worker-{worker} message {i} {padding}\n")
+            batch_files.append(batch_file)
+
+        for mode in APPEND_MODES:
+            target = os.path.join(tmp, f"{mode}.log")
+            start = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, __file__, "-f", target, "--batch-file", batch_file,
+                                  "--append-mode", mode, "--buffer-size", str(buffer_size)],
+                                 stdout=subprocess.DEVNULL)
+                for batch_file in batch_files
+            ]
+            for process in processes:
+                process.wait()
+            elapsed = time.perf_counter() - start
+
+            seen = set()
+            torn = 0
+            with open(target, encoding="utf8") as f:
+                for line in f:
+                    match = line_pattern.match(line.rstrip("\n"))
+                    if match is None or match.group(3) != padding:
+                        torn += 1
+                    else:
+                        seen.add((match.group(1), match.group(2)))
+            missing = workers * messages_per_worker - len(seen)
+            total = workers * messages_per_worker
+            print(f"{mode:<10} | {elapsed:>7.2f} | {total / elapsed:>10,.0f} | {torn:>6} | {missing:>7}")
+
+def main():
+    try:
+        opts, _ = getopt.getopt(
+            args=sys.argv[1:],
+            shortopts="f:m:",
+            longopts=["filename=", "message=", "stdin", "batch-file=", "buffer-size=", "fsync=",
+                      "append-mode=", "stress="]
+        )
+    except getopt.GetoptError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    options = {"-f": "", "-m": None, "--stdin": False, "--batch-file": "", "--buffer-size": DEFAULT_BUFFER_SIZE,
+               "--fsync": ("never", None), "--append-mode": "atomic", "--stress": None}
+
+    try:
+        for opt, arg in opts:
+            print(f"Processing opt={opt}; arg={arg}")
+            if opt in ("-f", "--filename"):
+                options["-f"] = arg
+            elif opt in ("-m", "--message"):
+                options["-m"] = arg
+            elif opt == "--stdin":
+                options["--stdin"] = True
+            elif opt == "--batch-file":
+                options["--batch-file"] = arg
+            elif opt == "--buffer-size":
+                options["--buffer-size"] = int(arg)
+                if options["--buffer-size"] < 2:
+                    raise ValueError(f"--buffer-size must be at least 2 (0 is unbuffered, 1 is line buffering): {arg}")
+            elif opt == "--fsync":
+                options["--fsync"] = parse_fsync_policy(arg)
+            elif opt == "--append-mode":
+                if arg not in APPEND_MODES:
+                    raise ValueError(f"Unsupported append mode: {arg} (use {', '.join(APPEND_MODES)})")
+                options["--append-mode"] = arg
+            elif opt == "--stress":
+                workers, _, messages = arg.partition(":")
+                options["--stress"] = (int(workers), int(messages))
+            else:
+                raise Exception(f"Unsupported option: {opt}")
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    if options["--stress"] is not None:
+        stress(*options["--stress"])
+        sys.exit(0)
+
+    filename = options["-f"]
+    if not filename:
+        print("Error: filename is required.")
+        sys.exit(1)
+
+    if not options["--stdin"] and not options["--batch-file"]:
+        message = options["-m"] or ""
+        append_messages(filename, [message], options["--buffer-size"], options["--fsync"], options["--append-mode"])
+        print(f"Wrote message '{message}' to filename: {filename}")
+        sys.exit(0)
+
+    def messages():
+        if options["-m"] is not None:
+            yield options["-m"]
+        if options["--batch-file"]:
+            with open(options["--batch-file"], encoding="utf8") as batch:
+                yield from read_lines(batch)
+        if options["--stdin"]:
+            yield from read_lines(sys.stdin)
+
+    start = time.perf_counter()
+    count = append_messages(filename, messages(), options["--buffer-size"], options["--fsync"], options["--append-mode"])
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} messages to filename: {filename} in {elapsed:.3f}s ({count / max(elapsed, 1e-9):,.0f} lines/sec)")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+
+# $ cat messages.txt | python tuto-04-argument-parsing.py -f out.txt --stdin --append-mode lock
+# Processing opt=-f; arg=out.txt
+# Processing opt=--stdin; arg=
+# Processing opt=--append-mode; arg=lock
+# Wrote 100000 messages to filename: out.txt in 0.071s (1,410,249 lines/sec)
+
+# $ python tuto-04-argument-parsing.py -f out.txt --append-mode sometimes
+# Processing opt=-f; arg=out.txt
+# Processing opt=--append-mode; arg=sometimes
+# Error: Unsupported append mode: sometimes (use unbuffered, buffered, atomic, lock)
+
+# $ python tuto-04-argument-parsing.py --stress 8:50000
+# Processing opt=--stress; arg=8:50000
+# 8 processes x 50,000 messages, --buffer-size 65536
+# mode       | seconds |  lines/sec |   torn | missing
+# unbuffered |    1.41 |    284,608 |    108 |     108
+# buffered   |    0.72 |    553,757 |      0 |       0
+# atomic     |    0.78 |    510,845 |      0 |       0
+# lock       |    0.79 |    507,354 |      0 |       0
+
+# torn = lines that are not one complete message; unbuffered mode interleaves "message" and "\n" writes of
+# different processes. This run used a single CPU, which serializes most of the work; on a multi-core host
+# far more writes overlap, which only the atomic and lock modes are designed to survive.
+
+###################################
+# Demo 04 - getopt - Bulk append mode
+# Demo 03 writes one -m message per process, so a shell loop pays interpreter startup for every line.
+# --stdin / --batch-file stream many messages (one per line) into ONE open, buffered file handle:
+#   --buffer-size BYTES : write buffer of the file handle (default 1 MiB, at least 2)
+#   --fsync POLICY      : never (default, the OS decides), interval:<seconds> or every:<n messages>
+# and the throughput is printed at the end.
+import getopt
+import os
+import time
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+def parse_fsync_policy(value):
+    kind, _, arg = value.partition(":")
+    if kind == "never" and not arg:
+        return ("never", None)
+    if kind == "interval" and arg:
+        return ("interval", float(arg))
+    if kind == "every" and arg and int(arg) > 0:
+        return ("every", int(arg))
+    raise ValueError(f"Unsupported fsync policy: {value} (use never, interval:<seconds> or every:<n>)")
+
+def append_messages(filename, messages, buffer_size=DEFAULT_BUFFER_SIZE, fsync_policy=("never", None)):
+    """Append every message as one line, return the number of lines written"""
+    kind, arg = fsync_policy
+    count = 0
+    last_sync = time.monotonic()
+    with open(filename, mode="a", encoding="utf8", buffering=buffer_size) as f:
+        write = f.write
+        for message in messages:
+            write(message + "\n")
+            count += 1
+            if kind == "every" and count % arg == 0:
+                f.flush()
+                os.fsync(f.fileno())
+            elif kind == "interval" and time.monotonic() - last_sync >= arg:
+                f.flush()
+                os.fsync(f.fileno())
+                last_sync = time.monotonic()
+        if kind != "never":
+            f.flush()
+            os.fsync(f.fileno())
+    return count
+
+def read_lines(stream):
+    for line in stream:
+        yield line.rstrip("\n")
+
+def main():
+    try:
+        opts, _ = getopt.getopt(
+            args=sys.argv[1:],
+            shortopts="f:m:",
+            longopts=["filename=", "message=", "stdin", "batch-file=", "buffer-size=", "fsync="]
+        )
+    except getopt.GetoptError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    options = {"-f": "", "-m": None, "--stdin": False, "--batch-file": "",
+               "--buffer-size": DEFAULT_BUFFER_SIZE, "--fsync": ("never", None)}
+
+    try:
+        for opt, arg in opts:
+            print(f"Processing opt={opt}; arg={arg}")
+            if opt in ("-f", "--filename"):
+                options["-f"] = arg
+            elif opt in ("-m", "--message"):
+                options["-m"] = arg
+            elif opt == "--stdin":
+                options["--stdin"] = True
+            elif opt == "--batch-file":
+                options["--batch-file"] = arg
+            elif opt == "--buffer-size":
+                options["--buffer-size"] = int(arg)
+                if options["--buffer-size"] < 2:
+                    raise ValueError(f"--buffer-size must be at least 2 (0 is unbuffered, 1 is line buffering): {arg}")
+            elif opt == "--fsync":
+                options["--fsync"] = parse_fsync_policy(arg)
+            else:
+                raise Exception(f"Unsupported option: {opt}")
+    except ValueError as err:
+        print(f"Error: {err}")
+        sys.exit(1)
+
+    filename = options["-f"]
+    if not filename:
+        print("Error: filename is required.")
+        sys.exit(1)
+
+    if not options["--stdin"] and not options["--batch-file"]:
+        message = options["-m"] or ""
+        append_messages(filename, [message], options["--buffer-size"], options["--fsync"])
+        print(f"Wrote message '{message}' to filename: {filename}")
+        sys.exit(0)
+
+    def messages():
+        if options["-m"] is not None:
+            yield options["-m"]
+        if options["--batch-file"]:
+            with open(options["--batch-file"], encoding="utf8") as batch:
+                yield from read_lines(batch)
+        if options["--stdin"]:
+            yield from read_lines(sys.stdin)
+
+    start = time.perf_counter()
+    count = append_messages(filename, messages(), options["--buffer-size"], options["--fsync"])
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {count} messages to filename: {filename} in {elapsed:.3f}s ({count / max(elapsed, 1e-9):,.0f} lines/sec)")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+
+# $ python tuto-04-argument-parsing.py -f tuto-04-argument-parsing-test.txt -m Bon-weekend\ Paris\ !
+# Processing opt=-f; arg=tuto-04-argument-parsing-test.txt
+# Processing opt=-m; arg=Bon-weekend Paris !
+# Wrote message 'Bon-weekend Paris !' to filename: tuto-04-argument-parsing-test.txt
+
+# $ seq 1 100000 | sed "s/^/message /" > messages.txt
+
+# $ python tuto-04-argument-parsing.py -f out.txt --batch-file messages.txt
+# Processing opt=-f; arg=out.txt
+# Processing opt=--batch-file; arg=messages.txt
+# Wrote 100000 messages to filename: out.txt in 0.027s (3,738,427 lines/sec)
+
+# $ cat messages.txt | python tuto-04-argument-parsing.py -f out.txt --stdin --fsync every:10000
+# Processing opt=-f; arg=out.txt
+# Processing opt=--stdin; arg=
+# Processing opt=--fsync; arg=every:10000
+# Wrote 100000 messages to filename: out.txt in 0.042s (2,356,863 lines/sec)
+
+# $ cat messages.txt | python tuto-04-argument-parsing.py -f out.txt --stdin --buffer-size 8192 --fsync interval:0.01
+# Processing opt=-f; arg=out.txt
+# Processing opt=--stdin; arg=
+# Processing opt=--buffer-size; arg=8192
+# Processing opt=--fsync; arg=interval:0.01
+# Wrote 100000 messages to filename: out.txt in 0.068s (1,473,720 lines/sec)
+
+# $ time (for i in $(seq 1 200); do python tuto-04-argument-parsing.py -f out.txt -m "message $i" > /dev/null; done)
+# real	0m18.651s   (200 lines, ~93 ms of interpreter startup per line)
+
+# $ python tuto-04-argument-parsing.py -f out.txt --stdin --fsync sometimes
+# Processing opt=-f; arg=out.txt
+# Processing opt=--stdin; arg=
+# Processing opt=--fsync; arg=sometimes
+# Error: Unsupported fsync policy: sometimes (use never, interval:<seconds> or every:<n>)
+
 ###################################
 # Demo 03 - getopt - Toi uu hoa
 import getopt
@@ -17,6 +17,601 @@ Abstraction is a feature of object-oriented programming languages that allows yo
     An abstract method is a method that is declared in an abstract class but does not have an implementation.
 """
 
+import sys
+
+################################################################################
+# Demo 04 - Event-sourced ledger with periodic snapshots
+# LedgerAccount is a BankAccount whose every deposit()/withdraw() (rejected withdrawals included) is appended
+# to a binary transaction log, one fixed-size 17-byte record: timestamp ns (int64), op (uint8), amount (float64).
+# Every `snapshot_every` events the balance is appended to a snapshot file (event count, timestamp, balance).
+#   - get_balance() stays O(1): the current balance is kept in memory, as in SavingsAccount
+#   - balance_at(t) starts from the last snapshot taken at or before t (bisect) and replays only the events
+#     after it: O(snapshot_every) instead of O(all events); records are fixed-size, so event i is at i * 17
+#   - reopening an existing log restores the balance from the last snapshot + the events after it; a partial
+#     last record (crash in the middle of a write) is truncated first, and an unknown op raises ValueError
+#   - a rejected withdrawal is decided when it happens and logged as REJECTED, so replay never re-checks funds
+#   - timestamps never decrease (a clock stepping back is clamped to the previous event's time), and a .snap
+#     left without its log is deleted
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+
+DEPOSIT, WITHDRAW, REJECTED = 0, 1, 2
+RECORD = struct.Struct("<qBd")     # timestamp_ns, op, amount
+SNAPSHOT = struct.Struct("<qqd")   # events before the snapshot, timestamp_ns of the last one, balance
+SIGN = {DEPOSIT: 1.0, WITHDRAW: -1.0, REJECTED: 0.0}
+
+def _sign(op: int, index: int) -> float:
+    try:
+        return SIGN[op]
+    except KeyError:
+        raise ValueError(f"corrupt record {index}: unknown op {op}") from None
+
+def _truncate_torn_tail(path: str, record_size: int) -> int:
+    """Drop a partial last record; returns the number of complete records"""
+    size = os.path.getsize(path)
+    if size % record_size:
+        os.truncate(path, size - size % record_size)
+    return size // record_size
+
+class BankAccount(ABC):
+    def __init__(self, owner: str, balance: float = 0.0):
+        self._owner = owner
+        self._balance = balance
+
+    @abstractmethod
+    def withdraw(self, amount: float) -> bool:
+        pass
+
+    @abstractmethod
+    def deposit(self, amount: float) -> None:
+        pass
+
+    def get_balance(self):
+        return self._balance
+
+class LedgerAccount(BankAccount):
+    """Account backed by `<path>` (transaction log) and `<path>.snap` (snapshots)"""
+    def __init__(self, owner: str, path: str, balance: float = 0.0, snapshot_every: int = 10_000,
+                 clock=time.time_ns):
+        super().__init__(owner, 0.0)
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self._clock = clock
+        self._snapshot_counts = [0]
+        self._snapshot_times = [-1]
+        self._snapshot_balances = [0.0]
+        self._events = 0
+        self._last_timestamp = -1
+        if os.path.exists(path):
+            self._load()
+        elif os.path.exists(path + ".snap"):
+            os.remove(path + ".snap")  # snapshots of a log that is gone: appending to them would mix two histories
+        self._log = open(path, "ab")
+        self._snap = open(path + ".snap", "ab")
+        if not self._events and balance:
+            self.deposit(balance)
+
+    def _load(self):
+        # a crash can leave a partial last record: cut it off, or every later append would be misaligned
+        events = _truncate_torn_tail(self.path, RECORD.size)
+        if os.path.exists(self.path + ".snap"):
+            _truncate_torn_tail(self.path + ".snap", SNAPSHOT.size)
+            with open(self.path + ".snap", "rb") as f:
+                for count, timestamp, balance in SNAPSHOT.iter_unpack(f.read()):
+                    if count > events:
+                        break  # snapshot of events that did not reach the log
+                    self._snapshot_counts.append(count)
+                    self._snapshot_times.append(timestamp)
+                    self._snapshot_balances.append(balance)
+        self._events = self._snapshot_counts[-1]
+        self._balance = self._snapshot_balances[-1]
+        self._last_timestamp = self._snapshot_times[-1]
+        for timestamp, op, amount in self._read_events(self._events):
+            self._balance += _sign(op, self._events) * amount
+            self._events += 1
+            self._last_timestamp = timestamp
+
+    def _append(self, op: int, amount: float) -> None:
+        # time.time_ns() can step back (NTP, manual change); balance_at() bisects, so timestamps must not decrease
+        timestamp = self._last_timestamp = max(self._clock(), self._last_timestamp)
+        self._log.write(RECORD.pack(timestamp, op, amount))
+        self._events += 1
+        if self._events % self.snapshot_every == 0:
+            self._snap.write(SNAPSHOT.pack(self._events, timestamp, self._balance))
+            self._snapshot_counts.append(self._events)
+            self._snapshot_times.append(timestamp)
+            self._snapshot_balances.append(self._balance)
+
+    def withdraw(self, amount: float) -> bool:
+        if amount > self._balance:
+            self._append(REJECTED, amount)
+            return False
+        self._balance -= amount
+        self._append(WITHDRAW, amount)
+        return True
+
+    def deposit(self, amount: float) -> None:
+        self._balance += amount
+        self._append(DEPOSIT, amount)
+
+    def __len__(self):
+        return self._events
+
+    def _read_events(self, start: int, chunk_events: int = 65_536):
+        if hasattr(self, "_log"):
+            self._log.flush()
+        with open(self.path, "rb") as f:
+            f.seek(start * RECORD.size)
+            while chunk := f.read(chunk_events * RECORD.size):
+                yield from RECORD.iter_unpack(chunk[:len(chunk) - len(chunk) % RECORD.size])
+
+    def balance_at(self, timestamp_ns: int, use_snapshots: bool = True) -> float:
+        """Balance after every event with a timestamp <= timestamp_ns"""
+        index = bisect_right(self._snapshot_times, timestamp_ns) - 1 if use_snapshots else 0
+        balance = self._snapshot_balances[index]
+        start = self._snapshot_counts[index]
+        for event, (timestamp, op, amount) in enumerate(self._read_events(start), start):
+            if timestamp > timestamp_ns:
+                break
+            balance += _sign(op, event) * amount
+        return balance
+
+    def close(self) -> None:
+        self._log.close()
+        self._snap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def benchmark(events=10_000_000, snapshot_every=10_000, queries=20):
+    import random
+    rng = random.Random(42)
+    clock = iter(range(1_000, 1_000 * (events + 2), 1_000)).__next__  # one event per µs, reproducible
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ledger.bin")
+        start = time.perf_counter()
+        with LedgerAccount("bench", path, snapshot_every=snapshot_every, clock=clock) as account:
+            for _ in range(events):
+                amount = rng.randint(1, 100)
+                if rng.random() < 0.5:
+                    account.deposit(amount)
+                else:
+                    account.withdraw(amount)
+            write_time = time.perf_counter() - start
+            print(f"{events:,} events written in {write_time:.1f} s "
+                  f"({os.path.getsize(path) / 2 ** 20:.0f} MiB log, "
+                  f"{os.path.getsize(path + '.snap') / 2 ** 10:.0f} KiB snapshots)")
+
+            start = time.perf_counter()
+            for _ in range(1_000_000):
+                account.get_balance()
+            print(f"get_balance()                 : {(time.perf_counter() - start) * 1e3:8.1f} ns/call")
+
+            start = time.perf_counter()
+            replayed = account.balance_at(1_000 * events, use_snapshots=False)
+            print(f"{f'replay all {events:,} events':<30}: {(time.perf_counter() - start) * 1e3:8.1f} ms "
+                  f"(same as get_balance(): {replayed == account.get_balance()})")
+
+            points = [rng.randrange(1_000, 1_000 * (events + 1)) for _ in range(queries)]
+            start = time.perf_counter()
+            expected = [account.balance_at(point, use_snapshots=False) for point in points[:2]]
+            full_time = (time.perf_counter() - start) / 2
+            print(f"balance_at() w/o snapshots    : {full_time * 1e3:8.1f} ms/call")
+            start = time.perf_counter()
+            results = [account.balance_at(point) for point in points]
+            snap_time = (time.perf_counter() - start) / queries
+            print(f"balance_at() from snapshot    : {snap_time * 1e3:8.1f} ms/call ({full_time / snap_time:,.0f}x)")
+            print(f"same result as full replay    : {results[:2] == expected}")
+            balance = account.get_balance()
+
+        start = time.perf_counter()
+        with LedgerAccount("bench", path, snapshot_every=snapshot_every) as reopened:
+            reopen_time = time.perf_counter() - start
+            print(f"reopen (restore balance)      : {reopen_time * 1e3:8.1f} ms, "
+                  f"same balance: {reopened.get_balance() == balance}")
+
+if __name__ == "__main__":
+    ticks = iter(range(1, 100)).__next__
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "alice.bin")
+        with LedgerAccount("Alice", path, balance=100, snapshot_every=2, clock=ticks) as account:
+            account.deposit(50)                     # t=2
+            print(f"withdraw $500: {account.withdraw(500)}")  # t=3, rejected but logged
+            account.withdraw(30)                    # t=4
+            account.deposit(10)                     # t=5
+            print(f"events={len(account)} balance=${account.get_balance()}")
+            print("history:", [account.balance_at(t) for t in range(6)])
+        with LedgerAccount("Alice", path) as account:
+            print(f"reopened: events={len(account)} balance=${account.get_balance()}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-05-abstraction.py
+# withdraw $500: False
+# events=5 balance=$130.0
+# history: [0.0, 100.0, 150.0, 150.0, 120.0, 130.0]
+# reopened: events=5 balance=$130.0
+
+# 10,000,000 events written in 13.6 s (162 MiB log, 20 KiB snapshots)
+# get_balance()                 :     73.8 ns/call
+# replay all 10,000,000 events  :   2891.2 ms (same as get_balance(): True)
+# balance_at() w/o snapshots    :    355.6 ms/call
+# balance_at() from snapshot    :      1.7 ms/call (212x)
+# same result as full replay    : True
+# reopen (restore balance)      :      0.4 ms, same balance: True
+#   - snapshot_every trades snapshot size (24 bytes each) for replay length: 10,000 -> at most 10,000 records
+#     (170 KiB) read per balance_at(), whatever the length of the history
+#   - writes go through the buffered log file (~1.4 µs/event here); flush()/fsync() policy is the caller's,
+#     as in tuto-04 (balance_at() flushes before reading so it always sees its own writes)
+
+################################################################################
+# Demo 03 - Batch transaction engine on a columnar balance array
+# A settlement file is millions of (account_id, amount) rows: amount > 0 is a deposit, amount < 0 a withdrawal.
+# Calling SavingsAccount.deposit()/withdraw() per row costs a method call and a print() each.
+# BalanceColumn keeps all balances in ONE array (NumPy float64 when available, else array('d')) indexed by
+# account id, and apply_batch() applies a whole batch, returning a per-row status array (1 = applied,
+# 0 = rejected: insufficient funds, same rule as SavingsAccount.withdraw: amount > balance).
+# Rows are applied in file order per account. With NumPy the rule is enforced vectorized: rows are ranked by
+# how many earlier rows their account has; all rows of one rank touch distinct accounts, so each rank is one
+# vectorized step (gather balances, add, compare, scatter). The number of steps is the largest number of rows
+# of a single account, not the number of rows.
+import time
+from abc import ABC, abstractmethod
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, array('d') is always available
+    np = None
+
+class BankAccount(ABC):
+    def __init__(self, owner: str, balance: float = 0.0):
+        self._owner = owner
+        self._balance = balance
+
+    @abstractmethod
+    def withdraw(self, amount: float):
+        pass
+
+    @abstractmethod
+    def deposit(self, amount: float):
+        pass
+
+    def get_balance(self):
+        return self._balance
+
+class SavingsAccount(BankAccount):
+    def withdraw(self, amount: float):
+        if amount > self._balance:
+            print("Insufficient funds")
+        else:
+            self._balance -= amount
+            print(f"Withdrew ${amount}")
+
+    def deposit(self, amount: float):
+        self._balance += amount
+        print(f"Deposited ${amount}")
+
+class BalanceColumn:
+    """Balances of accounts 0..n-1 in one contiguous array"""
+    backend = "numpy" if np is not None else "array"
+
+    def __init__(self, balances):
+        self.balances = np.array(balances, dtype=np.float64) if np is not None else array("d", balances)
+
+    def __len__(self):
+        return len(self.balances)
+
+    def apply_batch(self, account_ids, amounts):
+        if len(account_ids) != len(amounts):
+            raise ValueError(f"account_ids and amounts differ in length: {len(account_ids)} != {len(amounts)}")
+        if np is not None:
+            return self._apply_numpy(np.asarray(account_ids, dtype=np.int64), np.asarray(amounts, dtype=np.float64))
+        return self._apply_array(account_ids, amounts)
+
+    def _apply_array(self, account_ids, amounts):
+        if len(account_ids) and (min(account_ids) < 0 or max(account_ids) >= len(self.balances)):
+            raise IndexError("account id out of range")
+        balances = self.balances
+        status = array("b", bytes(len(amounts)))
+        for row, (account_id, amount) in enumerate(zip(account_ids, amounts)):
+            balance = balances[account_id]
+            if amount < 0 and -amount > balance:
+                continue
+            balances[account_id] = balance + amount
+            status[row] = 1
+        return status
+
+    def _apply_numpy(self, account_ids, amounts):
+        if len(account_ids) and (account_ids.min() < 0 or account_ids.max() >= len(self.balances)):
+            raise IndexError("account id out of range")
+        status = np.zeros(len(amounts), dtype=np.int8)
+        if not len(amounts):
+            return status
+        # rank = how many earlier rows the same account has; rows of equal rank touch distinct accounts
+        by_account = _stable_order(account_ids)
+        sorted_ids = account_ids[by_account]
+        group_start = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        group_size = np.diff(np.r_[group_start, len(sorted_ids)])
+        rank = np.empty(len(amounts), dtype=np.int64)
+        rank[by_account] = np.arange(len(sorted_ids)) - np.repeat(group_start, group_size)
+        by_rank = _stable_order(rank)
+        bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+
+        balances = self.balances
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            rows = by_rank[begin:end]
+            ids = account_ids[rows]
+            row_amounts = amounts[rows]
+            current = balances[ids]
+            updated = current + row_amounts
+            ok = (row_amounts >= 0) | (updated >= 0)  # reject when amount > balance
+            balances[ids] = np.where(ok, updated, current)
+            status[rows] = ok
+        return status
+
+def _stable_order(keys):
+    # NumPy's stable sort is a radix sort for 16-bit keys: ~7x faster than for int64 on 1M rows
+    if keys.max() < 1 << 16:
+        keys = keys.astype(np.uint16)
+    return np.argsort(keys, kind="stable")
+
+def make_settlement(accounts, rows, seed=42):
+    """Parsed settlement file as two columns: array('q') account ids, array('d') amounts"""
+    import random
+    rng = random.Random(seed)
+    account_ids = array("q", (rng.randrange(accounts) for _ in range(rows)))
+    amounts = array("d", (rng.choice((1, -1)) * rng.randint(1, 300) for _ in range(rows)))
+    return account_ids, amounts
+
+def benchmark(accounts=10_000, sizes=(10_000, 100_000, 1_000_000)):
+    import contextlib
+    import io
+    print(f"{accounts:,} accounts x $100, backend={BalanceColumn.backend}")
+    print(f"{'rows':>10} | {'SavingsAccount loop (s)':>23} | {'apply_batch (s)':>15} | {'speedup':>8} | same result")
+    for rows in sizes:
+        account_ids, amounts = make_settlement(accounts, rows)
+
+        objects = [SavingsAccount(f"owner-{i}", 100) for i in range(accounts)]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):  # the per-row prints, as in production
+            for account_id, amount in zip(account_ids, amounts):
+                if amount >= 0:
+                    objects[account_id].deposit(amount)
+                else:
+                    objects[account_id].withdraw(-amount)
+        loop_time = time.perf_counter() - start
+
+        column = BalanceColumn([100] * accounts)
+        start = time.perf_counter()
+        column.apply_batch(account_ids, amounts)
+        batch_time = time.perf_counter() - start
+
+        same = all(abs(account.get_balance() - balance) < 1e-6 for account, balance in zip(objects, column.balances))
+        print(f"{rows:>10,} | {loop_time:>23.3f} | {batch_time:>15.3f} | {loop_time / batch_time:>7.1f}x | {same}")
+
+if __name__ == "__main__":
+    column = BalanceColumn([1000, 50, 0])
+    status = column.apply_batch([0, 1, 1, 2, 1, 2], [500, -80, 40, -10, -80, 10])
+    print(f"status={[int(ok) for ok in status]} balances={[float(balance) for balance in column.balances]}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-05-abstraction.py
+# status=[1, 0, 1, 0, 1, 1] balances=[1500.0, 10.0, 10.0]
+
+# 10,000 accounts x $100, backend=numpy
+#       rows | SavingsAccount loop (s) | apply_batch (s) |  speedup | same result
+#     10,000 |                   0.015 |           0.001 |    10.4x | True
+#    100,000 |                   0.167 |           0.011 |    15.5x | True
+#  1,000,000 |                   1.480 |           0.110 |    13.5x | True
+#   - the rule is order-dependent (a withdrawal may only be rejected once every earlier row of its account is
+#     known), so it cannot be one cumsum; ranking by row-within-account keeps it exact and makes the loop length
+#     the busiest account's row count (141 here), not 1M
+#   - both argsorts use 16-bit keys when they fit: NumPy's stable sort is then a radix sort (~0.02 s vs ~0.11 s)
+#   - without NumPy, apply_batch is a plain loop over array('d'): only ~3.5x, from dropping the method calls and
+#     prints; that misses the 10x target, which needs the NumPy backend
+#   - both backends raise IndexError("account id out of range") for ids outside 0..n-1, negative ones included
+
+################################################################################
+# Demo 02 - Lock-striped concurrent ledger
+# SavingsAccount.withdraw/deposit do read-modify-write on _balance without any lock,
+# so two threads can both read the same balance and one update is lost.
+# AccountStore keeps many accounts and protects them with lock striping:
+#   - `stripes` locks instead of one global lock; account id -> stripe = hash(id) % stripes
+#   - operations on accounts of different stripes run without waiting for each other
+#   - transfer(a, b) takes both stripe locks in increasing stripe order, so two opposite transfers
+#     can never wait on each other (no deadlock), and the money is never visible "in flight"
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+class BankAccount(ABC):
+    def __init__(self, owner: str, balance: float = 0.0):
+        self._owner = owner
+        self._balance = balance
+
+    @abstractmethod
+    def withdraw(self, amount: float) -> bool:
+        pass
+
+    @abstractmethod
+    def deposit(self, amount: float) -> None:
+        pass
+
+    def get_balance(self):
+        return self._balance
+
+class SavingsAccount(BankAccount):
+    def __init__(self, owner: str, balance: float = 0.0, verbose: bool = True):
+        super().__init__(owner, balance)
+        self.verbose = verbose
+
+    def withdraw(self, amount: float) -> bool:
+        if amount > self._balance:
+            if self.verbose:
+                print("Insufficient funds")
+            return False
+        self._balance -= amount
+        if self.verbose:
+            print(f"Withdrew ${amount}")
+        return True
+
+    def deposit(self, amount: float) -> None:
+        self._balance += amount
+        if self.verbose:
+            print(f"Deposited ${amount}")
+
+class AccountStore:
+    """Thread-safe store of many accounts, one lock per stripe of accounts
+
+    on_transfer(source_id, target_id, amount) is called while both locks are held (e.g. an audit write).
+    """
+    def __init__(self, stripes: int = 64, on_transfer=None):
+        self._accounts = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._on_transfer = on_transfer
+
+    def _stripe(self, account_id) -> int:
+        return hash(account_id) % len(self._locks)
+
+    def open_account(self, account_id, owner: str, balance: float = 0.0) -> None:
+        with self._locks[self._stripe(account_id)]:
+            if account_id in self._accounts:
+                raise ValueError(f"Account already exists: {account_id}")
+            self._accounts[account_id] = SavingsAccount(owner, balance, verbose=False)
+
+    def deposit(self, account_id, amount: float) -> None:
+        with self._locks[self._stripe(account_id)]:
+            self._accounts[account_id].deposit(amount)
+
+    def withdraw(self, account_id, amount: float) -> bool:
+        with self._locks[self._stripe(account_id)]:
+            return self._accounts[account_id].withdraw(amount)
+
+    def get_balance(self, account_id) -> float:
+        with self._locks[self._stripe(account_id)]:
+            return self._accounts[account_id].get_balance()
+
+    def transfer(self, source_id, target_id, amount: float) -> bool:
+        if amount <= 0:
+            raise ValueError(f"Transfer amount must be positive: {amount}")
+        first, second = sorted((self._stripe(source_id), self._stripe(target_id)))
+        with self._locks[first]:
+            if second != first:
+                self._locks[second].acquire()
+            try:
+                source, target = self._accounts[source_id], self._accounts[target_id]  # KeyError before any change
+                if not source.withdraw(amount):
+                    return False
+                target.deposit(amount)
+                if self._on_transfer is not None:
+                    self._on_transfer(source_id, target_id, amount)
+                return True
+            finally:
+                if second != first:
+                    self._locks[second].release()
+
+    def total_balance(self) -> float:
+        """Consistent snapshot: holds every stripe lock (in order) while summing"""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            return sum(account.get_balance() for account in self._accounts.values())
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+def _audit_write(source_id, target_id, amount):
+    time.sleep(0.0002)  # simulated audit-log I/O inside the critical section (releases the GIL)
+
+def benchmark(accounts=1_000, thread_counts=(1, 2, 4, 8)):
+    scenarios = [
+        ("in-memory", None, 50_000),
+        ("+0.2 ms audit I/O", _audit_write, 500),
+    ]
+    print(f"{accounts} accounts x $100, random transfers")
+    print(f"{'scenario':<18} | {'stripes':>7} | {'threads':>7} | {'transfers/sec':>13} | {'total after':>11}")
+    for scenario, on_transfer, transfers_per_thread in scenarios:
+        for stripes in (1, 64):
+            for threads in thread_counts:
+                store = AccountStore(stripes=stripes, on_transfer=on_transfer)
+                for account_id in range(accounts):
+                    store.open_account(account_id, f"owner-{account_id}", 100)
+
+                def worker(seed):
+                    rng = random.Random(seed)
+                    for _ in range(transfers_per_thread):
+                        store.transfer(rng.randrange(accounts), rng.randrange(accounts), rng.randint(1, 50))
+
+                workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+                start = time.perf_counter()
+                for thread in workers:
+                    thread.start()
+                for thread in workers:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                print(f"{scenario:<18} | {stripes:>7} | {threads:>7} | {threads * transfers_per_thread / elapsed:>13,.0f} | "
+                      f"{store.total_balance():>11,.0f}")
+
+if __name__ == "__main__":
+    store = AccountStore()
+    store.open_account("alice", "Alice", 1000)
+    store.open_account("bob", "Bob", 200)
+    print(f"transfer alice -> bob $300: {store.transfer('alice', 'bob', 300)}")
+    print(f"transfer bob -> alice $900: {store.transfer('bob', 'alice', 900)}")
+    print(f"alice=${store.get_balance('alice')}, bob=${store.get_balance('bob')}, total=${store.total_balance()}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-05-abstraction.py
+# transfer alice -> bob $300: True
+# transfer bob -> alice $900: False
+# alice=$700, bob=$500, total=$1200
+
+# 1000 accounts x $100, random transfers
+# scenario           | stripes | threads | transfers/sec | total after
+# in-memory          |       1 |       1 |       287,780 |     100,000
+# in-memory          |       1 |       2 |       284,438 |     100,000
+# in-memory          |       1 |       4 |       334,957 |     100,000
+# in-memory          |       1 |       8 |       308,323 |     100,000
+# in-memory          |      64 |       1 |       289,290 |     100,000
+# in-memory          |      64 |       2 |       269,419 |     100,000
+# in-memory          |      64 |       4 |       297,154 |     100,000
+# in-memory          |      64 |       8 |       320,920 |     100,000
+# +0.2 ms audit I/O  |       1 |       1 |         3,523 |     100,000
+# +0.2 ms audit I/O  |       1 |       2 |         2,852 |     100,000
+# +0.2 ms audit I/O  |       1 |       4 |         3,161 |     100,000
+# +0.2 ms audit I/O  |       1 |       8 |         3,267 |     100,000
+# +0.2 ms audit I/O  |      64 |       1 |         3,159 |     100,000
+# +0.2 ms audit I/O  |      64 |       2 |         6,094 |     100,000
+# +0.2 ms audit I/O  |      64 |       4 |        10,627 |     100,000
+# +0.2 ms audit I/O  |      64 |       8 |        21,826 |     100,000
+
+"""
+🧩 Notes:
+    "total after" stays $100,000: no transfer is lost or half-applied.
+    In-memory transfers hold the GIL the whole time, so on CPython more threads cannot add throughput
+    whatever the locking. As soon as the critical section waits (I/O, or a free-threaded build),
+    one global lock serializes everything while 64 stripes let unrelated transfers overlap.
+"""
+
+################################################################################
+# Demo 01 - BankAccount abstraction
 from abc import ABC, abstractmethod
 
 # Abstract base class
@@ -7,7 +7,224 @@ Access modifiers in Python:
     protected (_name): meant for internal use only (convention).
     private (__name): name mangling to prevent direct access.
 """
+import sys
 
+################################################################################
+# Demo 02 - Compact Person records: __slots__ and a struct-of-arrays table
+# Demo 01's Person keeps its two private attributes in a per-instance __dict__ (~100+ bytes per record on top
+# of the object itself). For millions of records:
+#   SlottedPerson          : same class, same Name property semantics, but __slots__ = ("__name", "__age")
+#                            (slot names are mangled like attributes, so the fields stay private)
+#   SlottedPerson.many()   : bulk constructor, validates the two columns once, then builds the objects
+#                            with object.__new__ + a field setter mapped over the columns (no __init__)
+#   PersonTable            : struct-of-arrays, one list of names + one array('q') of ages;
+#                            table[i] is a light PersonRow view with the same Name property / repr
+#   PersonTable.from_columns(names, ages) : bulk constructor with column-level validation
+# Column validation keeps Demo 01's rules (not a str -> "Default Name", not an int -> 0), but checks a whole
+# column in one C-level pass (set(map(type, column))) and only falls back to per-value isinstance() checks
+# when that pass finds something unexpected. Ages are stored as int64: unlike Demo 01's Person, which keeps any
+# int, an age outside the int64 range raises OverflowError.
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from itertools import repeat
+
+DEFAULT_NAME = "Default Name"
+
+def _name_error(value):
+    print(f"Cannot set name based on value: {value}; with type: {type(value)}. Only support string for name")
+
+def validate_names(names) -> list:
+    names = list(names)
+    if set(map(type, names)) <= {str}:
+        return names
+    return [name if isinstance(name, str) else DEFAULT_NAME for name in names]
+
+def validate_ages(ages) -> array:
+    ages = list(ages)  # array() stops at the first bad value, which would leave an iterator half consumed
+    try:
+        return array("q", ages)  # accepts int (and bool, an int subclass), rejects everything else
+    except (TypeError, OverflowError):
+        pass
+    ages = [age if isinstance(age, int) else 0 for age in ages]
+    try:
+        return array("q", ages)
+    except OverflowError:
+        age = next(age for age in ages if not -1 << 63 <= age < 1 << 63)
+        raise OverflowError(f"age {age} does not fit in the int64 age column") from None
+
+class Person:
+    def __init__(self, name, age=0):
+        self.__name = name if isinstance(name, str) else DEFAULT_NAME
+        self.__age = age if isinstance(age, int) else 0
+
+    @property
+    def Name(self):
+        return self.__name
+
+    @Name.setter
+    def Name(self, value):
+        if isinstance(value, str):
+            self.__name = value
+        else:
+            _name_error(value)
+            self.__name = DEFAULT_NAME
+
+    def __repr__(self):
+        return f"Person(name={self.__name}, age={self.__age})"
+
+class SlottedPerson:
+    __slots__ = ("__name", "__age")
+
+    def __init__(self, name, age=0):
+        self.__name = name if isinstance(name, str) else DEFAULT_NAME
+        self.__age = age if isinstance(age, int) else 0
+
+    @classmethod
+    def many(cls, names, ages) -> list:
+        names, ages = validate_names(names), validate_ages(ages)
+        if len(names) != len(ages):
+            raise ValueError(f"names and ages differ in length: {len(names)} != {len(ages)}")
+        people = list(map(object.__new__, repeat(cls, len(names))))
+        deque(map(cls._set_fields, people, names, ages), maxlen=0)  # no per-row isinstance(), no __init__ call
+        return people
+
+    def _set_fields(self, name: str, age: int) -> None:
+        self.__name = name
+        self.__age = age
+
+    @property
+    def Name(self):
+        return self.__name
+
+    @Name.setter
+    def Name(self, value):
+        if isinstance(value, str):
+            self.__name = value
+        else:
+            _name_error(value)
+            self.__name = DEFAULT_NAME
+
+    def __repr__(self):
+        return f"Person(name={self.__name}, age={self.__age})"
+
+class PersonTable:
+    """Persons as columns: names (list of str) and ages (array('q'))"""
+    __slots__ = ("_names", "_ages")
+
+    def __init__(self):
+        self._names = []
+        self._ages = array("q")
+
+    @classmethod
+    def from_columns(cls, names, ages) -> "PersonTable":
+        table = cls()
+        table._names, table._ages = validate_names(names), validate_ages(ages)
+        if len(table._names) != len(table._ages):
+            raise ValueError(f"names and ages differ in length: {len(table._names)} != {len(table._ages)}")
+        return table
+
+    def append(self, name, age=0) -> None:
+        self._names.append(name if isinstance(name, str) else DEFAULT_NAME)
+        self._ages.append(age if isinstance(age, int) else 0)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __getitem__(self, index) -> "PersonRow":
+        if index < 0:
+            index += len(self._names)
+        if not 0 <= index < len(self._names):
+            raise IndexError("PersonTable index out of range")
+        return PersonRow(self, index)
+
+    def __iter__(self):
+        return map(PersonRow, repeat(self, len(self._names)), range(len(self._names)))
+
+class PersonRow:
+    """View of one row of a PersonTable, created on access"""
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: PersonTable, index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def Name(self):
+        return self._table._names[self._index]
+
+    @Name.setter
+    def Name(self, value):
+        if not isinstance(value, str):
+            _name_error(value)
+            value = DEFAULT_NAME
+        self._table._names[self._index] = value
+
+    def __repr__(self):
+        return f"Person(name={self._table._names[self._index]}, age={self._table._ages[self._index]})"
+
+def _measure(build):
+    """(seconds, bytes allocated) of build(); timed without tracemalloc, which slows every allocation down"""
+    start = time.perf_counter()
+    records = build()
+    elapsed = time.perf_counter() - start
+    del records
+    tracemalloc.start()
+    records = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, allocated
+
+def benchmark(count=1_000_000):
+    names = [f"person-{i}" for i in range(count)]  # shared by every variant, not counted
+    ages = [i % 100 for i in range(count)]
+    variants = [
+        ("Person (Demo 01)", lambda: [Person(name, age) for name, age in zip(names, ages)]),
+        ("SlottedPerson", lambda: [SlottedPerson(name, age) for name, age in zip(names, ages)]),
+        ("SlottedPerson.many", lambda: SlottedPerson.many(names, ages)),
+        ("PersonTable.from_columns", lambda: PersonTable.from_columns(names, ages)),
+    ]
+    print(f"{count:,} records (names/ages columns prebuilt)")
+    print(f"{'variant':<24} | {'bytes/record':>12} | {'records/sec':>12}")
+    for label, build in variants:
+        elapsed, allocated = _measure(build)
+        print(f"{label:<24} | {allocated / count:>12.1f} | {count / elapsed:>12,.0f}")
+
+if __name__ == "__main__":
+    table = PersonTable.from_columns(["Peter", "Bob", 42], [36, "?", 7])
+    print(list(table))
+    table[1].Name = 12345
+    print(table[1])
+    people = SlottedPerson.many(["Peter", None], [36, 2.5])
+    people[0].Name = "Pete"
+    print(people)
+    print(f"SlottedPerson has __dict__: {hasattr(people[0], '__dict__')}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-05-encapsulation.py
+# [Person(name=Peter, age=36), Person(name=Bob, age=0), Person(name=Default Name, age=7)]
+# Cannot set name based on value: 12345; with type: <class 'int'>. Only support string for name
+# Person(name=Default Name, age=0)
+# [Person(name=Pete, age=36), Person(name=Default Name, age=0)]
+# SlottedPerson has __dict__: False
+
+# 1,000,000 records (names/ages columns prebuilt)
+# variant                  | bytes/record |  records/sec
+# Person (Demo 01)         |         96.4 |      800,752
+# SlottedPerson            |         56.4 |    1,235,878
+# SlottedPerson.many       |         56.4 |    1,182,743
+# PersonTable.from_columns |         16.0 |   17,845,879
+#   - bytes/record excludes the name strings themselves (shared by all variants): Person = object + its __dict__
+#     + list slot, SlottedPerson = 48-byte object + list slot, PersonTable = 8-byte list slot + 8-byte int64 age
+#   - construction of single objects is dominated by the Python-level __init__ call; the table skips objects
+#     entirely and PersonRow views are only created when a row is accessed
+
+################################################################################
+# Demo 01 - Person with private attributes and a Name property
 class Person:
     def __init__(self, name, age=0):  # Thêm giá trị mặc định cho age
         self.__name = name if isinstance(name, str) else "Default Name"
@@ -9,6 +9,281 @@ Imagine you're building a system for vehicles.
     ElectricVehicle and GasVehicle: both extend Vehicle
     HybridVehicle: inherits from both ElectricVehicle and GasVehicle
 """
+import sys
+
+################################################################################
+# Demo 02 - Profiling a cooperative super() chain, and a flattened dispatch mode
+# HybridVehicle.start() runs 4 functions per call: every level re-resolves the next one through super()
+# (a super object + an MRO walk per level).
+#   SuperChainProfiler(cls, "start") : context manager that wraps the implementation of every class of cls.__mro__
+#                                      that defines "start", and records per level: calls, inclusive time and
+#                                      self time (inclusive minus the levels below it); report() prints them
+#   flat_method                      : opt-in "flattened" dispatch. Each class splits its method into
+#                                      before_<name> (code before super()) and after_<name> (code after it);
+#                                      the ordered list of these functions is computed once per class:
+#                                      befores in MRO order, then afters in reverse MRO order (same order as
+#                                      the super() chain), and compiled into one function stored in that class
+#   FlatDispatchMeta                 : metaclass of the flattened hierarchy; setting/deleting an attribute of
+#                                      a class (or its __bases__) drops the cached chains of that class and of
+#                                      all its subclasses, so monkey-patching keeps working
+import time
+from contextlib import redirect_stdout
+from functools import wraps
+from io import StringIO
+
+class Vehicle:
+    def start(self):
+        print("Vehicle starting...")
+
+class ElectricVehicle(Vehicle):
+    def start(self):
+        print("Electric system check...")
+        super().start()
+        print("Electric system check...-Done")
+
+class GasVehicle(Vehicle):
+    def start(self):
+        print("Fuel system check...")
+        super().start()
+        print("Fuel system check...-Done")
+
+class HybridVehicle(ElectricVehicle, GasVehicle):
+    def start(self):
+        print("Hybrid startup initiated:")
+        super().start()
+        print("Hybrid startup initiated...-Done")
+
+class SuperChainProfiler:
+    """Time spent at each MRO level of a cooperative super() chain (single thread)"""
+    def __init__(self, cls, name: str):
+        self.name = name
+        self.levels = [klass for klass in cls.__mro__ if name in vars(klass)]
+        self.stats = {klass: [0, 0.0, 0.0] for klass in self.levels}  # calls, inclusive, self
+        self._originals = {}
+        self._stack = []
+
+    def _wrap(self, klass, function):
+        stats, stack = self.stats[klass], self._stack
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += elapsed - children
+                if stack:
+                    stack[-1] += elapsed
+        return timed
+
+    def __enter__(self):
+        for klass in self.levels:
+            self._originals[klass] = vars(klass)[self.name]
+            setattr(klass, self.name, self._wrap(klass, self._originals[klass]))
+        return self
+
+    def __exit__(self, *exc_info):
+        for klass, function in self._originals.items():
+            setattr(klass, self.name, function)
+        self._originals.clear()
+
+    def report(self):
+        total = sum(stats[2] for stats in self.stats.values()) or 1.0
+        print(f"{'level':<24} | {'calls':>7} | {'inclusive ms':>12} | {'self ms':>8} | {'self %':>6}")
+        for klass in self.levels:
+            calls, inclusive, own = self.stats[klass]
+            print(f"{klass.__qualname__ + '.' + self.name:<24} | {calls:>7,} | {inclusive * 1e3:>12.2f} | "
+                  f"{own * 1e3:>8.2f} | {own / total:>6.1%}")
+
+def _chain(cls, name: str):
+    """before_<name> hooks in MRO order, then after_<name> hooks in reverse MRO order"""
+    befores = [vars(klass)[f"before_{name}"] for klass in cls.__mro__ if f"before_{name}" in vars(klass)]
+    afters = [vars(klass)[f"after_{name}"] for klass in reversed(cls.__mro__) if f"after_{name}" in vars(klass)]
+    return befores + afters
+
+def _compile_chain(cls, name: str):
+    """One function calling the whole chain; calls without arguments skip the *args/**kwargs forwarding"""
+    hooks = {f"_hook{index}": function for index, function in enumerate(_chain(cls, name))}
+    plain_calls = "".join(f"        {hook}(self)\n" for hook in hooks) or "        pass\n"
+    source = (f"def {name}(self, *args, **kwargs):\n"
+              f"    if args or kwargs:\n"
+              f"        for hook in _hooks:\n"
+              f"            hook(self, *args, **kwargs)\n"
+              f"    else:\n{plain_calls}")
+    namespace = dict(hooks, _hooks=tuple(hooks.values()))
+    exec(source, namespace)
+    function = namespace[name]
+    function.__qualname__ = f"{cls.__qualname__}.{name}"
+    return function
+
+class FlatDispatchMeta(type):
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+        # every class gets its own flat_method entry, later replaced by its own compiled chain
+        for klass in cls.__mro__[1:]:
+            for attr, value in vars(klass).items():
+                descriptor = getattr(value, "__flat_method__", value)
+                if isinstance(descriptor, flat_method) and attr not in vars(cls):
+                    type.__setattr__(cls, attr, descriptor)
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        cls._invalidate()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        cls._invalidate()
+
+    def _invalidate(cls):
+        pending = [cls]
+        while pending:
+            klass = pending.pop()
+            for name, value in list(vars(klass).items()):
+                if hasattr(value, "__flat_method__"):
+                    type.__setattr__(klass, name, value.__flat_method__)
+            pending.extend(type.__subclasses__(klass))
+
+class flat_method:
+    """Method whose implementation is the before_<name>/after_<name> hooks of every class of the MRO
+
+    The first access (on an instance, or on the class: Cls.start(obj)) compiles that class's chain and
+    stores it in the class __dict__ in place of the descriptor, so later calls are plain method calls.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        cls = type(obj) if obj is not None else owner
+        function = _compile_chain(cls, self.name)
+        function.__flat_method__ = self
+        type.__setattr__(cls, self.name, function)  # bypasses FlatDispatchMeta: not a change of the class
+        return function if obj is None else function.__get__(obj, cls)
+
+class FlatVehicle(metaclass=FlatDispatchMeta):
+    start = flat_method()
+
+    def before_start(self):
+        print("Vehicle starting...")
+
+class FlatElectricVehicle(FlatVehicle):
+    def before_start(self):
+        print("Electric system check...")
+
+    def after_start(self):
+        print("Electric system check...-Done")
+
+class FlatGasVehicle(FlatVehicle):
+    def before_start(self):
+        print("Fuel system check...")
+
+    def after_start(self):
+        print("Fuel system check...-Done")
+
+class FlatHybridVehicle(FlatElectricVehicle, FlatGasVehicle):
+    def before_start(self):
+        print("Hybrid startup initiated:")
+
+    def after_start(self):
+        print("Hybrid startup initiated...-Done")
+
+def make_hierarchies(depth: int):
+    """Two linear hierarchies of `depth` levels doing the same work per level: super() chain / flattened"""
+    source = ["class S0:\n    def start(self):\n        self.count += 1\n",
+              "class F0(metaclass=FlatDispatchMeta):\n    start = flat_method()\n"
+              "    def before_start(self):\n        self.count += 1\n"]
+    for level in range(1, depth):
+        source.append(f"class S{level}(S{level - 1}):\n    def start(self):\n        self.count += 1\n"
+                      f"        super().start()\n        self.count += 1\n")
+        source.append(f"class F{level}(F{level - 1}):\n    def before_start(self):\n        self.count += 1\n"
+                      f"    def after_start(self):\n        self.count += 1\n")
+    namespace = {"FlatDispatchMeta": FlatDispatchMeta, "flat_method": flat_method}
+    exec("".join(source), namespace)
+    return namespace[f"S{depth - 1}"], namespace[f"F{depth - 1}"]
+
+def benchmark(depths=(2, 4, 8, 16), calls=200_000):
+    print(f"{'depth':>5} | {'super() chain (calls/s)':>23} | {'flattened (calls/s)':>19} | {'speedup':>7} | same work")
+    for depth in depths:
+        rates = []
+        counts = []
+        for cls in make_hierarchies(depth):
+            obj = cls()
+            obj.count = 0
+            best = float("inf")
+            for _ in range(3):  # best of 3
+                start = time.perf_counter()
+                for _ in range(calls):
+                    obj.start()
+                best = min(best, time.perf_counter() - start)
+            rates.append(calls / best)
+            counts.append(obj.count)
+        print(f"{depth:>5} | {rates[0]:>23,.0f} | {rates[1]:>19,.0f} | {rates[1] / rates[0]:>6.1f}x | "
+              f"{counts[0] == counts[1]}")
+
+if __name__ == "__main__":
+    car = HybridVehicle()
+    with SuperChainProfiler(HybridVehicle, "start") as profiler:
+        with redirect_stdout(StringIO()):
+            for _ in range(10_000):
+                car.start()
+    profiler.report()
+    print()
+
+    print("MRO:", [cls.__name__ for cls in FlatHybridVehicle.__mro__])
+    flat_car = FlatHybridVehicle()
+    flat_car.start()
+    FlatGasVehicle().start()
+    FlatGasVehicle.before_start = lambda self: print("Fuel system check (patched)...")  # drops cached chains
+    flat_car.start()
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-05-multiple-inheritance-more-advanced.py
+# level                    |   calls | inclusive ms |  self ms | self %
+# HybridVehicle.start      |  10,000 |        92.50 |    27.42 |  29.6%
+# ElectricVehicle.start    |  10,000 |        65.08 |    28.49 |  30.8%
+# GasVehicle.start         |  10,000 |        36.59 |    26.39 |  28.5%
+# Vehicle.start            |  10,000 |        10.20 |    10.20 |  11.0%
+
+# MRO: ['FlatHybridVehicle', 'FlatElectricVehicle', 'FlatGasVehicle', 'FlatVehicle', 'object']
+# Hybrid startup initiated:
+# Electric system check...
+# Fuel system check...
+# Vehicle starting...
+# Fuel system check...-Done
+# Electric system check...-Done
+# Hybrid startup initiated...-Done
+# Fuel system check...
+# Vehicle starting...
+# Fuel system check...-Done
+# Hybrid startup initiated:
+# Electric system check...
+# Fuel system check (patched)...
+# Vehicle starting...
+# Fuel system check...-Done
+# Electric system check...-Done
+# Hybrid startup initiated...-Done
+
+# depth | super() chain (calls/s) | flattened (calls/s) | speedup | same work
+#     2 |               2,110,125 |           2,379,901 |    1.1x | True
+#     4 |                 925,574 |           1,229,634 |    1.3x | True
+#     8 |                 398,240 |             636,103 |    1.6x | True
+#    16 |                 319,411 |             497,267 |    1.6x | True
+#   - the profiler's own wrapper (two perf_counter() calls per level) is counted in the parent's self time,
+#     so compare levels with each other rather than with an unprofiled run
+#   - a flattened chain can only express "code before / code after the next level", which is what these
+#     chains do; a level that calls super() conditionally or uses its return value has to stay a super() chain
+#   - hooks are called without the *args/**kwargs forwarding when the method gets no arguments, which is
+#     where most of the gain at small depths comes from
+
+################################################################################
+# Demo 01 - Diamond inheritance and the super() chain
 class Vehicle:
     def start(self):
         print("Vehicle starting...")
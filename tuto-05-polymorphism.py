@@ -15,7 +15,149 @@ Polymorphism is a feature of object-oriented programming languages that allows o
     Method overriding is when a subclass provides its own implementation of a method that is already defined in its superclass.
     Method overloading is when a class provides multiple methods with the same name but different parameters.
 """
+import sys
 
+################################################################################
+# Demo 02 - Batch speak() grouped by concrete type
+# make_animal_speak() (Demo 01) per animal: looks up animal.speak through the MRO, creates a bound method,
+# reads __class__.__name__ and formats an f-string. For millions of mixed animals:
+#   make_animals_speak(animals)           : resolves cls.speak and the "<Name> says: " prefix ONCE per concrete type
+#                                           (type(a), so a subclass is its own type), then runs one C-level map()
+#                                           per step over the whole batch: type -> speak function -> sound -> line;
+#                                           returns the lines in input order; any iterable is accepted (it is
+#                                           copied into a list once, since the batch is read more than once)
+#   make_animals_speak(animals, ordered=False) : returns {cls: lines}, each group being
+#                                           compress(animals, type is cls) mapped through cls.speak
+# A line is built once per (type, sound) and then shared, instead of one f-string per animal.
+#   speak_dispatch                        : the same behaviour with functools.singledispatch, for comparison
+# The benchmark compares all of them on 1M animals of 5 types.
+import random
+import time
+from functools import singledispatch
+from itertools import compress, repeat
+from operator import call, getitem, is_
+
+class Animal:
+    def speak(self):
+        return "Some generic animal sound"
+
+class Dog(Animal):
+    def speak(self):
+        return "Woof!"
+
+class Cat(Animal):
+    def speak(self):
+        return "Meow!"
+
+class Cow(Animal):
+    def speak(self):
+        return "Moo!"
+
+class Puppy(Dog):
+    pass
+
+def make_animal_speak(animal: Animal):
+    return f"{animal.__class__.__name__} says: {animal.speak()}"
+
+class _Lines(dict):
+    """sound -> "<Name> says: <sound>", built once per distinct sound of a type"""
+    __slots__ = ("prefix",)
+
+    def __init__(self, cls):
+        self.prefix = f"{cls.__name__} says: "
+
+    def __missing__(self, sound):
+        line = self[sound] = self.prefix + sound
+        return line
+
+def make_animals_speak(animals, ordered: bool = True):
+    animals = list(animals)  # read several times below, so an iterator or generator must be materialized first
+    types = list(map(type, animals))
+    distinct = dict.fromkeys(types)  # in order of first appearance
+    if not ordered:
+        return {cls: list(map(_Lines(cls).__getitem__, map(cls.speak, compress(animals, map(is_, types, repeat(cls))))))
+                for cls in distinct}
+    speaks = {cls: cls.speak for cls in distinct}
+    lines = {cls: _Lines(cls) for cls in distinct}
+    sounds = map(call, map(speaks.__getitem__, types), animals)
+    return list(map(getitem, map(lines.__getitem__, types), sounds))
+
+@singledispatch
+def speak_dispatch(animal: Animal):
+    return "Some generic animal sound"
+
+@speak_dispatch.register
+def _(animal: Dog):
+    return "Woof!"
+
+@speak_dispatch.register
+def _(animal: Cat):
+    return "Meow!"
+
+@speak_dispatch.register
+def _(animal: Cow):
+    return "Moo!"
+
+def make_animal_speak_dispatch(animal: Animal):
+    return f"{type(animal).__name__} says: {speak_dispatch(animal)}"
+
+def benchmark(count=1_000_000, repeat=5):
+    rng = random.Random(7)
+    kinds = [Animal, Dog, Cat, Cow, Puppy]
+    animals = [rng.choice(kinds)() for _ in range(count)]
+    variants = [
+        ("virtual dispatch (Demo 01)", lambda: [make_animal_speak(animal) for animal in animals]),
+        ("functools.singledispatch", lambda: [make_animal_speak_dispatch(animal) for animal in animals]),
+        ("grouped, input order", lambda: make_animals_speak(animals)),
+        ("grouped, by type", lambda: make_animals_speak(animals, ordered=False)),
+    ]
+    expected = variants[0][1]()
+    print(f"{count:,} animals of {len(kinds)} types, best of {repeat}")
+    print(f"{'variant':<26} | {'animals/sec':>12} | {'vs virtual':>10} | same lines")
+    baseline = None
+    for label, run in variants:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            lines = run()
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        if isinstance(lines, dict):
+            same = sorted(line for group in lines.values() for line in group) == sorted(expected)
+        else:
+            same = lines == expected
+        print(f"{label:<26} | {count / best:>12,.0f} | {baseline / best:>9.1f}x | {same}")
+
+if __name__ == "__main__":
+    animals = [Dog(), Cat(), Cow(), Puppy(), Dog()]
+    print("\n".join(make_animals_speak(animals)))
+    print(make_animals_speak(animals, ordered=False))
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-05-polymorphism.py
+# Dog says: Woof!
+# Cat says: Meow!
+# Cow says: Moo!
+# Puppy says: Woof!
+# Dog says: Woof!
+# {<class '__main__.Dog'>: ['Dog says: Woof!', 'Dog says: Woof!'], <class '__main__.Cat'>: ['Cat says: Meow!'], <class '__main__.Cow'>: ['Cow says: Moo!'], <class '__main__.Puppy'>: ['Puppy says: Woof!']}
+
+# 1,000,000 animals of 5 types, best of 5
+# variant                    |  animals/sec | vs virtual | same lines
+# virtual dispatch (Demo 01) |    2,681,933 |       1.0x | True
+# functools.singledispatch   |    1,149,398 |       0.4x | True
+# grouped, input order       |    3,180,676 |       1.2x | True
+# grouped, by type           |    2,970,991 |       1.1x | True
+#   - every path still calls speak() once per animal (its result may depend on the instance), a Python-level
+#     call of ~50-60 ns here; the batch path removes the per-animal attribute lookup, bound method and f-string
+#   - singledispatch pays a dispatch() call and a WeakKeyDictionary lookup per animal on top of the call
+#   - by type makes one compress() pass over the batch per distinct type, so it suits a few types per batch
+
+################################################################################
+# Demo 01 - make_animal_speak and method overriding
 class Animal:
     def speak(self):
         return "Some generic animal sound"
@@ -1,5 +1,544 @@
 """Type Hinting"""
+import sys
 
+################################################################################
+# Demo 03 - @type_checked: runtime enforcement of annotations with generated validators
+# Checking annotations on each call with typing.get_type_hints() + inspect.signature().bind() + isinstance()
+# costs microseconds per call. @type_checked does all the introspection ONCE, at decoration time:
+#   - each annotation becomes a plain Python expression: int -> isinstance(x, int), int | None ->
+#     isinstance(x, int) or x is None, Literal[...] -> x in {...}, Any / no annotation -> no check
+#   - list[int], tuple[int, ...], set[str], dict[str, int]... check the container type and then only
+#     `sample` elements (evenly spaced for sequences, the first ones for sets/dicts; all of them when there
+#     are no more than `sample`; sequences other than list/tuple, e.g. deque, are indexed instead of
+#     sliced): O(sample) per call instead of O(len); sample must be >= 1
+#   - the checks are generated as the source of a wrapper with the SAME parameter list as the function
+#     (no *args/**kwargs re-binding) and compiled once per signature: functions with the same signature
+#     (names, kinds, annotations) share one compiled factory, cached in _wrapper_factories
+#   - a failed check raises TypeError naming the function, the argument and the expected/actual type
+import collections.abc
+import inspect
+import time
+import types
+import typing
+from functools import wraps
+from itertools import islice, repeat
+
+_wrapper_factories = {}  # signature key -> factory(function, defaults) -> checked wrapper
+_SEQUENCES = (list, tuple, collections.abc.Sequence)
+_UNORDERED = (set, frozenset, collections.abc.Set)
+_MAPPINGS = (dict, collections.abc.Mapping)
+_NUMERIC_TOWER = {float: (float, int), complex: (complex, float, int)}  # int is accepted for float (PEP 484)
+
+def _spaced(values, sample: int):
+    """Every (len // sample)-th element; slicing only for list/tuple, a Sequence such as deque may not slice"""
+    step = len(values) // sample
+    if isinstance(values, (list, tuple)):
+        return values[::step]
+    return map(values.__getitem__, range(0, len(values), step))
+
+def _sampled(values, check, sample: int) -> bool:
+    if len(values) <= sample:
+        return all(map(check, values))
+    return all(map(check, _spaced(values, sample)))
+
+def _sampled_unordered(values, check, sample: int) -> bool:
+    return all(map(check, islice(values, sample)))
+
+def _sampled_types(values, classes, sample: int) -> bool:
+    """_sampled() for a plain class: isinstance() is mapped directly, no Python-level call per element"""
+    if len(values) > sample:
+        values = _spaced(values, sample)
+    return all(map(isinstance, values, repeat(classes)))
+
+def _sampled_unordered_types(values, classes, sample: int) -> bool:
+    return all(map(isinstance, islice(values, sample), repeat(classes)))
+
+def _sampled_items(mapping, check_key, check_value, sample: int) -> bool:
+    return all(check_key(key) and check_value(value) for key, value in islice(mapping.items(), sample))
+
+def _accept(value) -> bool:
+    return True
+
+def _describe(annotation) -> str:
+    return annotation.__name__ if isinstance(annotation, type) else repr(annotation).replace("typing.", "")
+
+def _fail(function: str, name: str, value, annotation):
+    what = "return value" if name == "return" else f"argument '{name}'"
+    raise TypeError(f"{function}() {what} must be {_describe(annotation)}, got {type(value).__name__}")
+
+class _Checks:
+    """Builds the source of one check expression per annotation; objects it needs go in `namespace`"""
+    def __init__(self, sample: int):
+        self.sample = sample
+        self.namespace = {"_sampled": _sampled, "_sampled_unordered": _sampled_unordered,
+                          "_sampled_types": _sampled_types, "_sampled_unordered_types": _sampled_unordered_types,
+                          "_sampled_items": _sampled_items, "_accept": _accept, "_fail": _fail}
+
+    def _name(self, value) -> str:
+        name = f"_c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def _predicate(self, annotation) -> str:
+        """Name of a one-argument function returning the check, or None when anything is accepted"""
+        expression = self.expression(annotation, "value")
+        if expression is None:
+            return None
+        return self._name(eval(f"lambda value: {expression}", self.namespace))
+
+    def expression(self, annotation, var: str):
+        if annotation is typing.Any or annotation is inspect.Parameter.empty:
+            return None
+        if annotation is None or annotation is type(None):
+            return f"{var} is None"
+        origin, args = typing.get_origin(annotation), typing.get_args(annotation)
+        if origin is typing.Union or origin is types.UnionType:
+            parts = [self.expression(arg, var) for arg in args]
+            return None if None in parts else " or ".join(f"({part})" for part in parts)
+        if origin is typing.Literal:
+            return f"{var} in {self._name(frozenset(args))}"
+        if origin is None:
+            if not isinstance(annotation, type):
+                return None
+            accepted = _NUMERIC_TOWER.get(annotation, annotation)
+            return f"isinstance({var}, {self._name(accepted)})"
+        if not isinstance(origin, type):
+            return None  # Callable[...], TypeVar-based generics...: not checked
+        container = f"isinstance({var}, {self._name(origin)})"
+        if issubclass(origin, tuple) and args and args[-1] is not Ellipsis:
+            checks = [self.expression(arg, f"{var}[{index}]") for index, arg in enumerate(args)]
+            return " and ".join([container, f"len({var}) == {len(args)}"] + [f"({c})" for c in checks if c])
+        if issubclass(origin, _MAPPINGS) and len(args) == 2:
+            check_key, check_value = self._predicate(args[0]), self._predicate(args[1])
+            if check_key is None and check_value is None:
+                return container
+            return (f"{container} and _sampled_items({var}, {check_key or '_accept'}, {check_value or '_accept'}, "
+                    f"{self.sample})")
+        if args and issubclass(origin, _SEQUENCES + _UNORDERED):
+            helper = "_sampled_unordered" if issubclass(origin, _UNORDERED) else "_sampled"
+            if isinstance(args[0], type) and typing.get_origin(args[0]) is None:
+                classes = self._name(_NUMERIC_TOWER.get(args[0], args[0]))
+                return f"{container} and {helper}_types({var}, {classes}, {self.sample})"
+            check = self._predicate(args[0])
+            if check is None:
+                return container
+            return f"{container} and {helper}({var}, {check}, {self.sample})"
+        return container
+
+def _signature_key(signature: inspect.Signature, hints: dict, sample: int):
+    parameters = tuple((parameter.name, parameter.kind, hints.get(parameter.name, inspect.Parameter.empty),
+                        parameter.default is not inspect.Parameter.empty)
+                       for parameter in signature.parameters.values())
+    return parameters, hints.get("return", inspect.Parameter.empty), sample
+
+def _build_factory(signature: inspect.Signature, hints: dict, sample: int):
+    checks = _Checks(sample)
+    params, call, body = [], [], []
+    default_index = 0
+    kinds = inspect.Parameter
+    previous_kind = None
+    for parameter in signature.parameters.values():
+        if previous_kind is kinds.POSITIONAL_ONLY and parameter.kind is not kinds.POSITIONAL_ONLY:
+            params.append("/")
+        if parameter.kind is kinds.KEYWORD_ONLY and previous_kind not in (kinds.KEYWORD_ONLY, kinds.VAR_POSITIONAL):
+            params.append("*")
+        previous_kind = parameter.kind
+        text = parameter.name
+        if parameter.kind is kinds.VAR_POSITIONAL:
+            text = f"*{parameter.name}"
+            call.append(text)
+        elif parameter.kind is kinds.VAR_KEYWORD:
+            text = f"**{parameter.name}"
+            call.append(text)
+        elif parameter.kind is kinds.KEYWORD_ONLY:
+            call.append(f"{parameter.name}={parameter.name}")
+        else:
+            call.append(parameter.name)
+        if parameter.default is not kinds.empty:
+            text += f"=_defaults[{default_index}]"
+            default_index += 1
+        params.append(text)
+        annotation = hints.get(parameter.name, kinds.empty)
+        if parameter.kind in (kinds.VAR_POSITIONAL, kinds.VAR_KEYWORD):
+            check = checks._predicate(annotation)
+            values = parameter.name if parameter.kind is kinds.VAR_POSITIONAL else f"{parameter.name}.values()"
+            if check:
+                body.append(f"    for _value in {values}:\n"
+                            f"        if not {check}(_value): _fail(_qualname, {parameter.name!r}, _value, "
+                            f"{checks._name(annotation)})\n")
+            continue
+        expression = checks.expression(annotation, parameter.name)
+        if expression:
+            body.append(f"    if not ({expression}): _fail(_qualname, {parameter.name!r}, {parameter.name}, "
+                        f"{checks._name(annotation)})\n")
+    if previous_kind is kinds.POSITIONAL_ONLY:
+        params.append("/")
+    returns = hints.get("return", kinds.empty)
+    return_check = checks.expression(returns, "_result")
+    if return_check:
+        body.append(f"    _result = _function({', '.join(call)})\n"
+                    f"    if not ({return_check}): _fail(_qualname, 'return', _result, {checks._name(returns)})\n"
+                    f"    return _result\n")
+    else:
+        body.append(f"    return _function({', '.join(call)})\n")
+    source = (f"def _factory(_function, _defaults, _qualname):\n"
+              f"  def checked({', '.join(params)}):\n" + "".join("  " + line for line in "".join(body).splitlines(True))
+              + "  return checked\n")
+    exec(source, checks.namespace)
+    factory = checks.namespace["_factory"]
+    factory.source = source
+    return factory
+
+def type_checked(function=None, *, sample: int = 8):
+    """Check arguments and return value against the annotations, with validators generated once per signature"""
+    if sample < 1:
+        raise ValueError(f"sample must be at least 1, got {sample}")
+    if function is None:
+        return lambda function: type_checked(function, sample=sample)
+    signature = inspect.signature(function)
+    hints = typing.get_type_hints(function)
+    key = _signature_key(signature, hints, sample)
+    factory = _wrapper_factories.get(key)
+    if factory is None:
+        factory = _wrapper_factories[key] = _build_factory(signature, hints, sample)
+    defaults = tuple(parameter.default for parameter in signature.parameters.values()
+                     if parameter.default is not inspect.Parameter.empty)
+    return wraps(function)(factory(function, defaults, function.__qualname__))
+
+def naive_type_checked(function):
+    """The per-call approach: introspect on every call and check every element"""
+    @wraps(function)
+    def checked(*args, **kwargs):
+        hints = typing.get_type_hints(function)
+        bound = inspect.signature(function).bind(*args, **kwargs)
+        for name, value in bound.arguments.items():
+            expected = hints.get(name)
+            origin = typing.get_origin(expected) or expected
+            if isinstance(origin, type) and not isinstance(value, origin):
+                raise TypeError(f"{function.__qualname__}() argument '{name}' must be {expected}")
+            if origin is list and not all(isinstance(item, typing.get_args(expected)[0]) for item in value):
+                raise TypeError(f"{function.__qualname__}() argument '{name}' must be {expected}")
+        return function(*args, **kwargs)
+    return checked
+
+def get_addition_10(x: int) -> int:
+    return x + 10
+
+def get_multication_2(x: int) -> int:
+    return x * 2
+
+def total(values: list[int], start: int = 0) -> int:
+    return sum(values, start)
+
+def describe(name: str, scores: dict[str, float] | None = None, *, unit: typing.Literal["pt", "%"] = "pt") -> str:
+    return f"{name}: {sum((scores or {}).values())} {unit}"
+
+def benchmark(calls=200_000, length=1_000):
+    values = list(range(length))
+    cases = [
+        ("get_addition_10(5)", get_addition_10, (5,)),
+        (f"total(list[int] of {length:,})", total, (values,)),
+    ]
+    print(f"{'function':<26} | {'decorator':<26} | {'ns/call':>8} | {'overhead ns':>11}")
+    for label, function, args in cases:
+        variants = [("none", function), ("naive_type_checked", naive_type_checked(function)),
+                    ("type_checked(sample=8)", type_checked(function)),
+                    (f"type_checked(sample={length})", type_checked(function, sample=length))]
+        baseline = None
+        for name, decorated in variants:
+            count = calls if name != "naive_type_checked" else calls // 10
+            best = float("inf")
+            for _ in range(3):
+                start = time.perf_counter()
+                for _ in range(count):
+                    decorated(*args)
+                best = min(best, (time.perf_counter() - start) / count)
+            baseline = baseline if baseline is not None else best
+            print(f"{label:<26} | {name:<26} | {best * 1e9:>8.0f} | {(best - baseline) * 1e9:>11.0f}")
+
+if __name__ == "__main__":
+    checked_add = type_checked(get_addition_10)
+    checked_mul = type_checked(get_multication_2)
+    print(f"checked_mul(checked_add(5)) = {checked_mul(checked_add(5))}")
+    print(f"one compiled factory shared by both: {len(_wrapper_factories)}")
+    checked_describe = type_checked(describe)
+    print(checked_describe("alice", {"math": 9.5}, unit="%"))
+    print(checked_describe.__wrapped__ is describe, inspect.signature(checked_describe))
+    for call in (lambda: checked_add("5"), lambda: type_checked(total)([1, 2, "3"]),
+                 lambda: checked_describe("bob", unit="kg"), lambda: checked_describe("bob", {"math": "A"})):
+        try:
+            call()
+        except TypeError as error:
+            print(f"TypeError: {error}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-06-type-hinting.py
+# checked_mul(checked_add(5)) = 30
+# one compiled factory shared by both: 1
+# alice: 9.5 %
+# True (name: str, scores: dict[str, float] | None = None, *, unit: Literal['pt', '%'] = 'pt') -> str
+# TypeError: get_addition_10() argument 'x' must be int, got str
+# TypeError: total() argument 'values' must be list[int], got list
+# TypeError: describe() argument 'unit' must be Literal['pt', '%'], got str
+# TypeError: describe() argument 'scores' must be dict[str, float] | None, got dict
+
+# function                   | decorator                  |  ns/call | overhead ns
+# get_addition_10(5)         | none                       |       95 |           0
+# get_addition_10(5)         | naive_type_checked         |    19778 |       19684
+# get_addition_10(5)         | type_checked(sample=8)     |      202 |         107
+# get_addition_10(5)         | type_checked(sample=1000)  |      201 |         107
+# total(list[int] of 1,000)  | none                       |     7359 |           0
+# total(list[int] of 1,000)  | naive_type_checked         |   527684 |      520325
+# total(list[int] of 1,000)  | type_checked(sample=8)     |     8235 |         875
+# total(list[int] of 1,000)  | type_checked(sample=1000)  |    36455 |       29096
+#   - the naive decorator spends its time in get_type_hints() and signature().bind(), not in isinstance()
+#   - what remains for a scalar argument is one extra Python call (the wrapper) plus inline isinstance() checks
+#   - sampling trades completeness for a bounded cost: a list with one bad element among 1,000 passes with
+#     sample=8 unless that element is sampled; use sample=len when every element matters
+#   - not checked: Callable, TypeVar, Protocol and other annotations that are not a class at runtime
+
+################################################################################
+# Demo 02 - compose(): a type-checked, fused pipeline of typed functions
+# get_multication_2(get_addition_10(x)) costs two Python calls per value. compose(f, g, ...) returns a Pipeline:
+#   - built once: every stage must be annotated with one parameter; the return type of each stage must be
+#     accepted by the parameter of the next one (same type or a subclass), otherwise TypeError at build time
+#   - a stage whose body is just `return <arithmetic on its parameter and constants>` is recognized as
+#     elementwise: its expression is inlined into the next one, e.g. (x + 10) * 2 for the two helpers below;
+#     other stages (and decorated ones, whose decorator must run) stay function calls inside the fused expression;
+#     a parameter used several times gets the previous expression once, through an assignment expression
+#   - the fused expression is compiled once into a scalar function (pipeline(x)) and a column function
+#     (pipeline.map(column)): one comprehension over an array/list, or, when every stage is elementwise,
+#     the expression evaluated on the whole NumPy array (vectorized), unless it uses //, %, ** or a shift,
+#     whose NumPy results differ from Python's (division by zero, negative powers and shift counts)
+import ast
+import copy
+import inspect
+import textwrap
+import time
+import typing
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, array('q') is always available
+    np = None
+
+_ELEMENTWISE_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load,
+                      ast.Add, ast.Sub, ast.Mult, ast.FloorDiv, ast.Mod, ast.Pow, ast.LShift, ast.RShift,
+                      ast.BitAnd, ast.BitOr, ast.BitXor, ast.USub, ast.UAdd, ast.Invert)
+# NumPy differs from Python for these: x // 0 and x % 0 give 0 (plus a warning) instead of ZeroDivisionError,
+# x ** -1 raises ValueError for integers, shifts by a negative count are undefined; such stages are still
+# inlined, but the pipeline is evaluated per value in Python
+_PYTHON_ONLY_OPERATORS = (ast.FloorDiv, ast.Mod, ast.Pow, ast.LShift, ast.RShift)
+_TYPECODES = {int: "q", float: "d"}
+
+def get_addition_10(x: int) -> int:
+    return x + 10
+
+def get_multication_2(x: int) -> int:
+    return x * 2
+
+def clamp_255(x: int) -> int:
+    return min(x, 255)
+
+def _elementwise_expression(function, parameter: str):
+    """AST of the returned expression if function is `return <arithmetic on parameter>`, else None
+
+    Only plain functions qualify: a decorated stage (or a functools.wraps wrapper, whose source
+    inspect.getsource() would read from the wrapped function) must run its decorator, so it stays a call.
+    """
+    if inspect.unwrap(function) is not function:
+        return None
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(function)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    if not tree.body or not isinstance(tree.body[0], ast.FunctionDef) or tree.body[0].decorator_list:
+        return None
+    body = tree.body[0].body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]  # docstring
+    if len(body) != 1 or not isinstance(body[0], ast.Return) or body[0].value is None:
+        return None
+    expression = ast.Expression(body[0].value)
+    for node in ast.walk(expression):
+        if not isinstance(node, _ELEMENTWISE_NODES) or (isinstance(node, ast.Name) and node.id != parameter):
+            return None
+        if isinstance(node, ast.Constant) and type(node.value) not in (int, float):
+            return None
+    return expression.body
+
+class _Substitute(ast.NodeTransformer):
+    """Replace the parameter by the previous stage's expression
+
+    When the parameter is used more than once, the expression is evaluated once: its first use (in evaluation
+    order, which is the visiting order for arithmetic) becomes `(temporary := expression)` and the other uses
+    read `temporary`, so e.g. `x * x + x` after a call stage still calls that stage once.
+    """
+    def __init__(self, parameter: str, replacement: ast.expr, temporary: str, uses: int):
+        self.parameter = parameter
+        self.replacement = replacement
+        self.temporary = temporary if uses > 1 and not isinstance(replacement, (ast.Name, ast.Constant)) else None
+        self.bound = False
+
+    def visit_Name(self, node):
+        if node.id != self.parameter:
+            return node
+        if self.temporary is None:
+            return copy.deepcopy(self.replacement)
+        if self.bound:
+            return ast.Name(self.temporary, ast.Load())
+        self.bound = True
+        return ast.NamedExpr(ast.Name(self.temporary, ast.Store()), self.replacement)
+
+class Pipeline:
+    """Functions applied left to right, validated and fused once"""
+    def __init__(self, *functions):
+        if not functions:
+            raise ValueError("Pipeline needs at least one function")
+        self.functions = functions
+        self.input_type, self.output_type = self._check_types(functions)
+        self.expression, self.vectorized = self._fuse(functions)
+        source = ast.unparse(self.expression)
+        namespace = {f"_stage{index}": function for index, function in enumerate(functions)}
+        self._scalar = eval(f"lambda x: {source}", namespace)
+        self._column = eval(f"lambda column: [{source} for x in column]", namespace)
+        self._vector = eval(f"lambda x: {source}", namespace) if self.vectorized else None
+
+    @staticmethod
+    def _check_types(functions):
+        previous = None
+        for function in functions:
+            hints = typing.get_type_hints(function)
+            parameters = list(inspect.signature(function).parameters)
+            if len(parameters) != 1 or parameters[0] not in hints or "return" not in hints:
+                raise TypeError(f"{function.__qualname__} must take one annotated parameter and annotate its return")
+            accepted = hints[parameters[0]]
+            if previous is None:
+                input_type = accepted
+            elif not (previous == accepted or isinstance(previous, type) and isinstance(accepted, type)
+                      and issubclass(previous, accepted)):
+                raise TypeError(f"{function.__qualname__} takes {accepted!r}, but the previous stage returns {previous!r}")
+            previous = hints["return"]
+        return input_type, previous
+
+    @staticmethod
+    def _fuse(functions):
+        current, vectorized = ast.Name("x", ast.Load()), True
+        for index, function in enumerate(functions):
+            parameter = next(iter(inspect.signature(function).parameters))
+            expression = _elementwise_expression(function, parameter)
+            if expression is None:
+                vectorized = False
+                current = ast.Call(ast.Name(f"_stage{index}", ast.Load()), [current], [])
+            else:
+                if any(isinstance(node, _PYTHON_ONLY_OPERATORS) for node in ast.walk(expression)):
+                    vectorized = False
+                uses = sum(isinstance(node, ast.Name) and node.id == parameter for node in ast.walk(expression))
+                current = _Substitute(parameter, current, f"_value{index}", uses).visit(expression)
+        return ast.fix_missing_locations(current), vectorized
+
+    def __call__(self, x):
+        return self._scalar(x)
+
+    def map(self, column):
+        """Apply the pipeline to a whole column; returns the same kind of container (ndarray, array or list)
+
+        An array column gives a list when the output type has no array typecode (str, Decimal, ...).
+        """
+        if np is not None and isinstance(column, np.ndarray):
+            if self.vectorized:
+                return self._vector(column)
+            return np.fromiter(self._column(column.tolist()), dtype=_TYPECODES.get(self.output_type, object),
+                               count=len(column))
+        if isinstance(column, array) and self.output_type in _TYPECODES:
+            return array(_TYPECODES[self.output_type], self._column(column))
+        return self._column(column)
+
+    def __repr__(self):
+        names = ", ".join(function.__name__ for function in self.functions)
+        return (f"Pipeline({names}: {self.input_type.__name__} -> {self.output_type.__name__}, "
+                f"x -> {ast.unparse(self.expression)}, vectorized={self.vectorized})")
+
+def compose(*functions) -> Pipeline:
+    return Pipeline(*functions)
+
+def print_data(x: str) -> None:
+    print(f"Value of x = {x}")
+
+def benchmark(size=1_000_000, repeat=3):
+    def best(run):
+        elapsed = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            elapsed = min(elapsed, time.perf_counter() - start)
+        return elapsed, list(result)
+
+    column = array("q", range(size))
+    fused = compose(get_addition_10, get_multication_2)
+    clamped = compose(get_addition_10, get_multication_2, clamp_255)
+    cases = [
+        ("nested calls, 2 stages", lambda: [get_multication_2(get_addition_10(x)) for x in column]),
+        ("compose().map(array)", lambda: fused.map(column)),
+        ("nested calls, 3 stages", lambda: [clamp_255(get_multication_2(get_addition_10(x))) for x in column]),
+        ("compose().map(array), 3", lambda: clamped.map(column)),
+    ]
+    if np is not None:
+        vector = np.arange(size, dtype=np.int64)
+        cases.insert(2, ("compose().map(ndarray)", lambda: fused.map(vector)))
+        cases.append(("compose().map(ndarray), 3", lambda: clamped.map(vector)))
+    print(f"{size:,} int64 values, best of {repeat}")
+    print(f"{'variant':<27} | {'ms':>8} | {'speedup':>8} | same result")
+    baseline = expected = None
+    for label, run in cases:
+        elapsed, result = best(run)
+        if label.startswith("nested"):
+            baseline, expected = elapsed, result
+        print(f"{label:<27} | {elapsed * 1e3:>8.1f} | {baseline / elapsed:>7.1f}x | {result == expected}")
+
+if __name__ == "__main__":
+    pipeline = compose(get_addition_10, get_multication_2)
+    print(pipeline)
+    print_data(str(pipeline(5)))
+    print(compose(get_addition_10, get_multication_2, clamp_255))
+    print(list(pipeline.map(array("q", [1, 2, 3]))))
+    try:
+        compose(get_addition_10, print_data)
+    except TypeError as error:
+        print(f"TypeError: {error}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-06-type-hinting.py
+# Pipeline(get_addition_10, get_multication_2: int -> int, x -> (x + 10) * 2, vectorized=True)
+# Value of x = 30
+# Pipeline(get_addition_10, get_multication_2, clamp_255: int -> int, x -> _stage2((x + 10) * 2), vectorized=False)
+# [22, 24, 26]
+# TypeError: print_data takes <class 'str'>, but the previous stage returns <class 'int'>
+
+# 1,000,000 int64 values, best of 3
+# variant                     |       ms |  speedup | same result
+# nested calls, 2 stages      |    143.6 |     1.0x | True
+# compose().map(array)        |    144.2 |     1.0x | True
+# compose().map(ndarray)      |      1.8 |    80.0x | True
+# nested calls, 3 stages      |    503.6 |     1.0x | True
+# compose().map(array), 3     |    463.7 |     1.1x | True
+# compose().map(ndarray), 3   |    475.7 |     1.1x | True
+#   - the array path still runs the expression per value in Python, but without the two function calls;
+#     the NumPy path runs each operator once over the whole column in C (one temporary array per operator)
+#   - a stage that is not plain arithmetic (clamp_255 calls min()) stays a call and turns vectorization off
+#     for the whole pipeline; NumPy int64 wraps on overflow where Python int does not, so the vectorized
+#     path is only exact while the values fit in 64 bits
+#   - recognition reads the source with inspect.getsource(): functions without source (builtins, exec()) stay calls
+
+################################################################################
+# Demo 01 - Annotations checked by mypy
 def get_addition_10(x: int) -> int:
     return x + 10
 
@@ -64,6 +64,218 @@ class PersonFactory:
         else:
             raise ValueError("Unknown person type")
 
+################################################################################
+# Demo 03 - Caching proxy: LRU + TTL, invalidation, negative caching, hit-rate metrics
+# PersonProxy above only prints and forwards. When the real subject is slow (remote directory, database),
+# CachingPersonProxy(person, methods=(...)) keeps the IPerson interface and memoizes the listed methods:
+#   - one OrderedDict for all cached methods, key = (method name, args, sorted kwargs): a hit moves the key to
+#     the end, an insert beyond `maxsize` evicts the least recently used entry
+#   - every entry expires `ttl` seconds after it was stored (checked on access, counted as an expiration)
+#   - negative caching: a call that raises one of `negative_exceptions` (default LookupError: unknown person)
+#     is cached for `negative_ttl` seconds and re-raised on hits, so repeated misses do not hit the subject;
+#     negative_ttl=0 turns it off (nothing is stored, nothing is evicted), as ttl=0 does for results
+#   - invalidate() drops everything, invalidate("lookup") one method, invalidate("lookup", "alice") one entry
+#   - cache_info(): hits, negative hits, misses, evictions, expirations, invalidations, hit rate
+#   - arguments that are not hashable are forwarded without caching; other methods/attributes are forwarded as is
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+_KWARGS_MARK = object()
+
+class SlowPersonDirectory(IPerson):
+    """Real subject: every call is a round trip of `latency` seconds"""
+    def __init__(self, people: dict, latency: float = 0.001) -> None:
+        self.people = people
+        self.latency = latency
+        self.calls = 0
+
+    def person_method(self) -> None:
+        print("I'm a person directory")
+
+    def lookup(self, name: str) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.people[name]  # KeyError for an unknown name
+
+    def grade(self, name: str, course: str = "math") -> int:
+        self.calls += 1
+        time.sleep(self.latency)
+        return self.people[name]["grades"][course]
+
+class CachingPersonProxy(IPerson):
+    """Proxy that memoizes the `methods` of a real IPerson"""
+    def __init__(self, person: IPerson, methods=(), maxsize: int = 1024, ttl: float = 60.0,
+                 negative_ttl: float = 5.0, negative_exceptions=(LookupError,), clock=time.monotonic) -> None:
+        self.person = person
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.negative_exceptions = negative_exceptions
+        self._clock = clock
+        self._cache = OrderedDict()  # key -> (expires_at, is_error, value or exception)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                       "invalidations": 0, "uncacheable": 0}
+        for name in methods:
+            setattr(self, name, self._caching(name, getattr(person, name)))
+
+    def person_method(self) -> None:
+        print("I'm a caching proxy")
+        self.person.person_method()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.person, name)
+
+    def _caching(self, name: str, method):
+        cache, lock, stats, clock = self._cache, self._lock, self._stats, self._clock
+
+        @wraps(method)
+        def cached(*args, **kwargs):
+            key = (name, args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))) if kwargs else (name, args)
+            try:
+                hash(key)
+            except TypeError:
+                stats["uncacheable"] += 1
+                return method(*args, **kwargs)
+            with lock:
+                entry = cache.get(key)
+                if entry is not None:
+                    expires_at, is_error, value = entry
+                    if clock() < expires_at:
+                        cache.move_to_end(key)
+                        if is_error:
+                            stats["negative_hits"] += 1
+                            raise value.with_traceback(None)  # else each re-raise extends its traceback
+                        stats["hits"] += 1
+                        return value
+                    del cache[key]
+                    stats["expirations"] += 1
+                stats["misses"] += 1
+            try:
+                value = method(*args, **kwargs)
+            except self.negative_exceptions as error:
+                if self.negative_ttl > 0:  # 0 disables negative caching: storing would only evict a live entry
+                    self._store(key, clock() + self.negative_ttl, True, error)
+                raise
+            if self.ttl > 0:
+                self._store(key, clock() + self.ttl, False, value)
+            return value
+        return cached
+
+    def _store(self, key, expires_at: float, is_error: bool, value) -> None:
+        with self._lock:
+            self._cache[key] = (expires_at, is_error, value)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, name: str = None, *args, **kwargs) -> int:
+        """Drop cached results: all of them, those of method `name`, or the one for name(*args, **kwargs)"""
+        with self._lock:
+            if name is None:
+                keys = list(self._cache)
+            elif args or kwargs:
+                key = (name, args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))) if kwargs else (name, args)
+                keys = [key] if key in self._cache else []
+            else:
+                keys = [key for key in self._cache if key[0] == name]
+            for key in keys:
+                del self._cache[key]
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def cache_info(self) -> dict:
+        with self._lock:
+            served = self._stats["hits"] + self._stats["negative_hits"]
+            calls = served + self._stats["misses"]
+            return dict(self._stats, currsize=len(self._cache), maxsize=self.maxsize,
+                        hit_rate=round(served / calls, 4) if calls else 0.0)
+
+def benchmark(requests=5_000, people=500, latency=0.001, seed=3):
+    """Zipf-like traffic: a few people are asked for very often; 5% of the names are unknown"""
+    import random
+    rng = random.Random(seed)
+    directory = {f"person{i}": {"name": f"person{i}", "grades": {"math": i % 10}} for i in range(people)}
+    names = [f"person{int(people * rng.paretovariate(1.2)) % people}" if rng.random() > 0.05
+             else f"ghost{rng.randrange(50)}" for _ in range(requests)]
+
+    def serve(subject):
+        found = 0
+        for name in names:
+            try:
+                subject.lookup(name)
+                found += 1
+            except KeyError:
+                pass
+        return found
+
+    print(f"{requests:,} lookups over {people} people (+unknown names), {latency * 1e3:.0f} ms per subject call")
+    print(f"{'subject':<28} | {'seconds':>7} | {'subject calls':>13} | {'hit rate':>8} | found")
+    for label, maxsize, negative_ttl in [("direct", None, None), ("proxy, maxsize=64", 64, 5.0),
+                                         ("proxy, maxsize=1024", 1024, 5.0),
+                                         ("proxy, no negative caching", 1024, 0.0)]:
+        real = SlowPersonDirectory(directory, latency)
+        subject = real if maxsize is None else CachingPersonProxy(real, ("lookup",), maxsize=maxsize,
+                                                                  negative_ttl=negative_ttl)
+        start = time.perf_counter()
+        found = serve(subject)
+        elapsed = time.perf_counter() - start
+        hit_rate = "-" if subject is real else f"{subject.cache_info()['hit_rate']:.1%}"
+        print(f"{label:<28} | {elapsed:>7.2f} | {real.calls:>13,} | {hit_rate:>8} | {found:,}")
+
+if __name__ == "__main__":
+    now = [0.0]
+    directory = SlowPersonDirectory({"alice": {"name": "Alice", "grades": {"math": 9}}})
+    proxy = CachingPersonProxy(directory, ("lookup", "grade"), maxsize=2, ttl=10, negative_ttl=1,
+                               clock=lambda: now[0])
+    proxy.person_method()
+    for _ in range(3):
+        proxy.lookup("alice")
+    print(f"lookup('alice') x3 -> subject calls: {directory.calls}")
+    for _ in range(2):
+        try:
+            proxy.lookup("bob")
+        except KeyError as error:
+            print(f"KeyError: {error}")
+    print(f"after 2 lookups of an unknown name -> subject calls: {directory.calls}")
+    proxy.grade("alice", course="math")  # third entry: evicts the least recently used one, lookup('alice')
+    now[0] = 11  # every entry has expired
+    proxy.grade("alice", course="math")
+    print(f"invalidate('lookup', 'bob') dropped {proxy.invalidate('lookup', 'bob')} entry")
+    print(proxy.cache_info())
+    print(f"forwarded attribute: latency={proxy.latency}")
+    print()
+    benchmark()
+
+sys.exit(0)
+
+# $ python tuto-08-structural-proxy-design-pattern.py
+# I'm a caching proxy
+# I'm a person directory
+# lookup('alice') x3 -> subject calls: 1
+# KeyError: 'bob'
+# KeyError: 'bob'
+# after 2 lookups of an unknown name -> subject calls: 2
+# invalidate('lookup', 'bob') dropped 1 entry
+# {'hits': 2, 'negative_hits': 1, 'misses': 4, 'evictions': 1, 'expirations': 1, 'invalidations': 1, 'uncacheable': 0, 'currsize': 1, 'maxsize': 2, 'hit_rate': 0.4286}
+# forwarded attribute: latency=0.001
+
+# 5,000 lookups over 500 people (+unknown names), 1 ms per subject call
+# subject                      | seconds | subject calls | hit rate | found
+# direct                       |    5.51 |         5,000 |        - | 4,726
+# proxy, maxsize=64            |    4.85 |         4,387 |    12.3% | 4,726
+# proxy, maxsize=1024          |    0.62 |           546 |    89.1% | 4,726
+# proxy, no negative caching   |    0.86 |           770 |    84.6% | 4,726
+#   - with maxsize=64 the long tail of the traffic keeps evicting the popular entries: size the cache from the
+#     number of distinct keys seen within one ttl, and watch evictions in cache_info()
+#   - unknown names are 5% of the requests but, without negative caching, 224 of the 770 subject calls
+#   - two concurrent misses on the same key both call the subject (no in-flight coalescing, unlike
+#     memoized() in tuto-02); the lock only protects the OrderedDict and the counters
+
+################################################################################
 # Demo 02
 choice = input("Choose a person type (person or proxy): ").strip().lower()
 try: